@@ -22,6 +22,7 @@ if config.config_file_name is not None:
 from user.models import User, Transaction
 from order.models import Order
 from product.models import Product, ProductGroup, ProductCategory
+from analytics.models import SalesDaily, ProductSalesDaily, SalesRollupDirty
 
 from database import Base
 
@@ -0,0 +1,32 @@
+"""add transaction idempotency key
+
+Revision ID: 5d0b7a91c2e4
+Revises: 8c1f4e2a9d37
+Create Date: 2026-10-18 11:03:27.918340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0b7a91c2e4'
+down_revision: Union[str, None] = '8c1f4e2a9d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('idempotency_key', sa.String(), nullable=True))
+    # the index is built concurrently so the ledger stays writable, then the
+    # constraint adopts it under a brief lock
+    with op.get_context().autocommit_block():
+        op.create_index('uq_transactions_user_id_idempotency_key', 'transactions', ['user_id', 'idempotency_key'], unique=True, if_not_exists=True, postgresql_concurrently=True)
+    op.execute("ALTER TABLE transactions ADD CONSTRAINT uq_transactions_user_id_idempotency_key UNIQUE USING INDEX uq_transactions_user_id_idempotency_key")
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_transactions_user_id_idempotency_key', 'transactions', type_='unique')
+    op.drop_column('transactions', 'idempotency_key')
@@ -0,0 +1,32 @@
+"""add inventory updates
+
+Revision ID: 7f5c3e8a1b92
+Revises: e3a91d4c7b20
+Create Date: 2026-10-18 17:26:45.118093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f5c3e8a1b92'
+down_revision: Union[str, None] = 'e3a91d4c7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('inventory_updates',
+    sa.Column('idempotency_key', sa.String(), nullable=False),
+    sa.Column('request_hash', sa.String(), nullable=False),
+    sa.Column('response', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('idempotency_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('inventory_updates')
@@ -0,0 +1,49 @@
+"""add product search indexes
+
+Revision ID: 8c1f4e2a9d37
+Revises: 254ae7e90533
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f4e2a9d37'
+down_revision: Union[str, None] = '254ae7e90533'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# unaccent() is only STABLE, so it cannot be used in an index expression.
+# f_unaccent pins the dictionary and is declared IMMUTABLE.
+SEARCH_INDEXES = [
+    ('ix_products_name_trgm', 'products', 'name'),
+    ('ix_products_supplier_trgm', 'products', 'supplier'),
+    ('ix_product_category_name_trgm', 'product_category', 'name'),
+    ('ix_product_group_name_trgm', 'product_group', 'name'),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$func$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $func$"
+    )
+    # built concurrently so writes to products are not blocked while the GIN
+    # indexes are built; the block commits the function created above first
+    with op.get_context().autocommit_block():
+        for name, table, column in SEARCH_INDEXES:
+            op.create_index(name, table, [sa.text(f"lower(f_unaccent({column})) gin_trgm_ops")], postgresql_using='gin', if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in SEARCH_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,50 @@
+"""cascade foreign key deletes
+
+Revision ID: a9e4b7c13d56
+Revises: c5d82f1e6a43
+Create Date: 2026-10-18 19:41:08.562913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4b7c13d56'
+down_revision: Union[str, None] = 'c5d82f1e6a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (constraint, table, column, referred table), named as create_all named them.
+# Deleting a parent removes the same rows the ORM cascades used to load and
+# delete one by one.
+FOREIGN_KEYS = [
+    ('transactions_user_id_fkey', 'transactions', 'user_id', 'users'),
+    ('orders_user_id_fkey', 'orders', 'user_id', 'users'),
+    ('order_detail_order_id_fkey', 'order_detail', 'order_id', 'orders'),
+    ('order_detail_product_id_fkey', 'order_detail', 'product_id', 'products'),
+    ('products_group_id_fkey', 'products', 'group_id', 'product_group'),
+    ('products_category_id_fkey', 'products', 'category_id', 'product_category'),
+    ('product_category_group_id_fkey', 'product_category', 'group_id', 'product_group'),
+]
+
+
+def _replace_foreign_keys(on_delete: str) -> None:
+    # NOT VALID swaps each constraint under a brief lock. The existing rows are
+    # checked by VALIDATE after that transaction commits, which does not block writes.
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {referred} (id) {on_delete} NOT VALID")
+    with op.get_context().autocommit_block():
+        for name, table, column, referred in FOREIGN_KEYS:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def upgrade() -> None:
+    _replace_foreign_keys("ON DELETE CASCADE")
+
+
+def downgrade() -> None:
+    _replace_foreign_keys("ON DELETE NO ACTION")
@@ -0,0 +1,123 @@
+"""add sales rollups
+
+Revision ID: b47e2c9f0a61
+Revises: 5d0b7a91c2e4
+Create Date: 2026-10-18 14:52:06.381277
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b47e2c9f0a61'
+down_revision: Union[str, None] = '5d0b7a91c2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Report days are UTC. To report in another zone, redefine both functions and
+# run `python -m analytics.refresh --full`.
+SALES_DAY_FUNCTIONS = """
+CREATE FUNCTION sales_day(timestamptz) RETURNS date
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT ($1 AT TIME ZONE 'UTC')::date $$;
+
+CREATE FUNCTION sales_day_start(date) RETURNS timestamptz
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT $1::timestamp AT TIME ZONE 'UTC' $$;
+"""
+
+# Statement-level triggers with transition tables mark each touched day once
+# per statement, so a multi-line checkout adds one marker rather than one per line.
+MARK_FUNCTIONS = """
+CREATE FUNCTION mark_sales_days_from_orders() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO sales_rollup_dirty (day)
+        SELECT DISTINCT sales_day(order_date) FROM new_rows WHERE order_date IS NOT NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO sales_rollup_dirty (day)
+        SELECT DISTINCT sales_day(order_date) FROM old_rows WHERE order_date IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION mark_sales_days_from_order_detail() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO sales_rollup_dirty (day)
+        SELECT DISTINCT sales_day(o.order_date) FROM new_rows r JOIN orders o ON o.id = r.order_id
+        WHERE o.order_date IS NOT NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- lines deleted along with their order are covered by the orders trigger
+        INSERT INTO sales_rollup_dirty (day)
+        SELECT DISTINCT sales_day(o.order_date) FROM old_rows r JOIN orders o ON o.id = r.order_id
+        WHERE o.order_date IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END $$;
+"""
+
+TRIGGERS = [
+    ('orders', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('orders', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('orders', 'DELETE', 'OLD TABLE AS old_rows'),
+    ('order_detail', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('order_detail', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('order_detail', 'DELETE', 'OLD TABLE AS old_rows'),
+]
+
+
+def upgrade() -> None:
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.DECIMAL(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('product_sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.DECIMAL(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_index(op.f('ix_product_sales_daily_product_id'), 'product_sales_daily', ['product_id'], unique=False)
+    op.create_table('sales_rollup_dirty',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute(SALES_DAY_FUNCTIONS)
+    op.execute(MARK_FUNCTIONS)
+    for table, event, transition in TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {table}_mark_sales_days_{event.lower()} AFTER {event} ON {table} "
+            f"REFERENCING {transition} FOR EACH STATEMENT EXECUTE FUNCTION mark_sales_days_from_{table}()"
+        )
+
+    # existing history is picked up by the first refresh
+    op.execute(
+        "INSERT INTO sales_rollup_dirty (day) "
+        "SELECT DISTINCT sales_day(order_date) FROM orders WHERE order_date IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    for table, event, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER {table}_mark_sales_days_{event.lower()} ON {table}")
+    op.execute("DROP FUNCTION mark_sales_days_from_order_detail()")
+    op.execute("DROP FUNCTION mark_sales_days_from_orders()")
+    op.execute("DROP FUNCTION sales_day_start(date)")
+    op.execute("DROP FUNCTION sales_day(timestamptz)")
+    op.drop_table('sales_rollup_dirty')
+    op.drop_index(op.f('ix_product_sales_daily_product_id'), table_name='product_sales_daily')
+    op.drop_table('product_sales_daily')
+    op.drop_table('sales_daily')
@@ -0,0 +1,61 @@
+"""fix foreign key indexes
+
+Revision ID: c5d82f1e6a43
+Revises: 7f5c3e8a1b92
+Create Date: 2026-10-18 19:02:37.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d82f1e6a43'
+down_revision: Union[str, None] = '7f5c3e8a1b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Referencing columns that are joined on, filtered by and scanned by cascades.
+# orders.user_id and transactions.user_id already lead
+# ix_orders_user_id_order_date and uq_transactions_user_id_idempotency_key.
+FOREIGN_KEY_INDEXES = [
+    ('ix_order_detail_order_id', 'order_detail', 'order_id'),
+    ('ix_order_detail_product_id', 'order_detail', 'product_id'),
+    ('ix_products_category_id', 'products', 'category_id'),
+    ('ix_products_group_id', 'products', 'group_id'),
+    ('ix_product_category_group_id', 'product_category', 'group_id'),
+]
+
+# Low-selectivity columns, and duplicates of the primary key indexes, that
+# create_all built from index=True and every write had to maintain.
+REDUNDANT_INDEXES = [
+    ('ix_users_role', 'users', 'role'),
+    ('ix_products_price', 'products', 'price'),
+    ('ix_products_discount_price', 'products', 'discount_price'),
+    ('ix_users_id', 'users', 'id'),
+    ('ix_transactions_id', 'transactions', 'id'),
+    ('ix_orders_id', 'orders', 'id'),
+    ('ix_order_detail_id', 'order_detail', 'id'),
+    ('ix_products_id', 'products', 'id'),
+    ('ix_product_group_id', 'product_group', 'id'),
+    ('ix_product_category_id', 'product_category', 'id'),
+]
+
+
+def upgrade() -> None:
+    # built and dropped concurrently so writes are not blocked on large tables
+    with op.get_context().autocommit_block():
+        for name, table, column in FOREIGN_KEY_INDEXES:
+            op.create_index(name, table, [column], unique=False, if_not_exists=True, postgresql_concurrently=True)
+        for name, table, column in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in REDUNDANT_INDEXES:
+            op.create_index(name, table, [column], unique=False, if_not_exists=True, postgresql_concurrently=True)
+        for name, table, column in FOREIGN_KEY_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
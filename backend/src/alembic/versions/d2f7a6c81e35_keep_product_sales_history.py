@@ -0,0 +1,36 @@
+"""keep product sales history
+
+Revision ID: d2f7a6c81e35
+Revises: a9e4b7c13d56
+Create Date: 2026-10-18 20:14:52.907341
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7a6c81e35'
+down_revision: Union[str, None] = 'a9e4b7c13d56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Deleting a product cascaded into its daily rollups, so past revenue reports
+# changed after the fact. Like sales_daily, the rollup now outlives its rows.
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE product_sales_daily DROP CONSTRAINT IF EXISTS product_sales_daily_product_id_fkey")
+
+
+def downgrade() -> None:
+    # history of deleted products cannot reference them again
+    op.execute("DELETE FROM product_sales_daily WHERE product_id NOT IN (SELECT id FROM products)")
+    op.execute(
+        "ALTER TABLE product_sales_daily ADD CONSTRAINT product_sales_daily_product_id_fkey "
+        "FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE product_sales_daily VALIDATE CONSTRAINT product_sales_daily_product_id_fkey")
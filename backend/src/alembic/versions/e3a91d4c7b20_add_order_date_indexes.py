@@ -0,0 +1,31 @@
+"""add order date indexes
+
+Revision ID: e3a91d4c7b20
+Revises: b47e2c9f0a61
+Create Date: 2026-10-18 15:40:12.704518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a91d4c7b20'
+down_revision: Union[str, None] = 'b47e2c9f0a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently so order writes are not blocked on a large table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_user_id_order_date', 'orders', ['user_id', 'order_date'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_orders_order_date_brin', 'orders', ['order_date'], unique=False, postgresql_using='brin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_order_date_brin', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_id_order_date', table_name='orders', postgresql_concurrently=True)
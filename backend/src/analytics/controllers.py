@@ -0,0 +1,129 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import Depends
+from sqlalchemy import Date, DateTime, cast, delete, func, select, text
+from sqlalchemy.orm import Session
+from database import get_db
+from analytics import models, schemas
+from order.models import Order
+from product.models import Product, ProductCategory, ProductGroup
+
+# Serialises refreshes; two concurrent ones would both rebuild the same day
+ROLLUP_LOCK_KEY = 0x5a1e5
+TOP_PRODUCTS_LIMIT = 10
+
+def _in_range(statement, column, start: Optional[date], end: Optional[date]):
+    # half-open [start, end) so consecutive ranges never count a day twice
+    if start is not None:
+        statement = statement.where(column >= start)
+    if end is not None:
+        statement = statement.where(column < end)
+    return statement
+
+# reports
+def get_revenue(period: schemas.Period, start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)) -> List[schemas.RevenuePoint]:
+    sales = models.SalesDaily
+    period_start = cast(func.date_trunc(period.value, cast(sales.day, DateTime)), Date).label('period_start')
+    statement = _in_range(
+        select(period_start, func.sum(sales.order_count).label('order_count'), func.sum(sales.revenue).label('revenue')),
+        sales.day, start, end,
+    ).group_by(period_start).order_by(period_start)
+    return [schemas.RevenuePoint.model_validate(row, from_attributes=True) for row in db.execute(statement)]
+
+def get_top_products(metric: schemas.SalesMetric, start: Optional[date] = None, end: Optional[date] = None, limit: int = TOP_PRODUCTS_LIMIT, db: Session = Depends(get_db)) -> List[schemas.ProductSales]:
+    sales = models.ProductSalesDaily
+    # rank on the rollup alone, then join names for the few rows that survive
+    totals = _in_range(
+        select(
+            sales.product_id,
+            func.sum(sales.order_count).label('order_count'),
+            func.sum(sales.quantity).label('quantity'),
+            func.sum(sales.revenue).label('revenue'),
+        ),
+        sales.day, start, end,
+    ).group_by(sales.product_id)
+    ranking = func.sum(getattr(sales, metric.value)).desc()
+    totals = totals.order_by(ranking, sales.product_id).limit(limit).subquery()
+    statement = (
+        select(totals, Product.name)
+        .outerjoin(Product, Product.id == totals.c.product_id)
+        .order_by(totals.c[metric.value].desc(), totals.c.product_id)
+    )
+    return [schemas.ProductSales.model_validate(row, from_attributes=True) for row in db.execute(statement)]
+
+def get_category_sales(start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)) -> List[schemas.CategorySales]:
+    sales = models.ProductSalesDaily
+    totals = _in_range(
+        select(
+            Product.category_id,
+            func.sum(sales.quantity).label('quantity'),
+            func.sum(sales.revenue).label('revenue'),
+        ).join(Product, Product.id == sales.product_id),
+        sales.day, start, end,
+    ).group_by(Product.category_id).subquery()
+    statement = (
+        select(totals, ProductCategory.name, ProductCategory.group_id)
+        .join(ProductCategory, ProductCategory.id == totals.c.category_id)
+        .order_by(totals.c.revenue.desc(), totals.c.category_id)
+    )
+    return [schemas.CategorySales.model_validate(row, from_attributes=True) for row in db.execute(statement)]
+
+def get_group_sales(start: Optional[date] = None, end: Optional[date] = None, db: Session = Depends(get_db)) -> List[schemas.GroupSales]:
+    sales = models.ProductSalesDaily
+    totals = _in_range(
+        select(
+            Product.group_id,
+            func.sum(sales.quantity).label('quantity'),
+            func.sum(sales.revenue).label('revenue'),
+        ).join(Product, Product.id == sales.product_id),
+        sales.day, start, end,
+    ).group_by(Product.group_id).subquery()
+    statement = (
+        select(totals, ProductGroup.name)
+        .join(ProductGroup, ProductGroup.id == totals.c.group_id)
+        .order_by(totals.c.revenue.desc(), totals.c.group_id)
+    )
+    return [schemas.GroupSales.model_validate(row, from_attributes=True) for row in db.execute(statement)]
+
+# rollup maintenance
+REFRESH_SALES_DAILY = text(
+    "INSERT INTO sales_daily (day, order_count, revenue) "
+    "SELECT d.day, count(*), sum(o.total_amount) "
+    "FROM unnest(CAST(:days AS date[])) AS d(day) "
+    "JOIN orders o ON o.order_date >= sales_day_start(d.day) AND o.order_date < sales_day_start(d.day + 1) "
+    "GROUP BY d.day"
+)
+
+REFRESH_PRODUCT_SALES_DAILY = text(
+    "INSERT INTO product_sales_daily (day, product_id, order_count, quantity, revenue) "
+    "SELECT d.day, od.product_id, count(DISTINCT od.order_id), sum(od.quantity), sum(od.quantity * od.unit_price) "
+    "FROM unnest(CAST(:days AS date[])) AS d(day) "
+    "JOIN orders o ON o.order_date >= sales_day_start(d.day) AND o.order_date < sales_day_start(d.day + 1) "
+    "JOIN order_detail od ON od.order_id = o.id "
+    "GROUP BY d.day, od.product_id"
+)
+
+def refresh_rollups(full: bool = False, db: Session = Depends(get_db)) -> schemas.RollupRefresh:
+    # Recomputes only the days marked dirty since the last refresh. Markers are
+    # consumed in the same transaction, so a marker whose writer has not yet
+    # committed stays behind for the next run instead of being lost.
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+    days = set(db.execute(delete(models.SalesRollupDirty).returning(models.SalesRollupDirty.day)).scalars())
+    # Rows of deleted products are kept: their order lines went with them, so
+    # they cannot be recomputed, and past reports must not change.
+    product_rows = models.ProductSalesDaily.product_id.in_(select(Product.id))
+    if full:
+        db.execute(delete(models.SalesDaily))
+        db.execute(delete(models.ProductSalesDaily).where(product_rows))
+        days = set(db.execute(
+            select(func.sales_day(Order.order_date)).where(Order.order_date.isnot(None)).distinct()
+        ).scalars())
+    elif days:
+        db.execute(delete(models.SalesDaily).where(models.SalesDaily.day.in_(days)))
+        db.execute(delete(models.ProductSalesDaily).where(models.ProductSalesDaily.day.in_(days), product_rows))
+
+    if days:
+        db.execute(REFRESH_SALES_DAILY, {"days": sorted(days)})
+        db.execute(REFRESH_PRODUCT_SALES_DAILY, {"days": sorted(days)})
+    db.commit()
+    return schemas.RollupRefresh(days=len(days))
@@ -0,0 +1,30 @@
+from database import Base
+from sqlalchemy import BigInteger, Column, Date, DECIMAL, Integer
+
+# Daily rollups of orders and order lines. Days are bucketed by the sales_day()
+# SQL function (UTC), and refreshed incrementally from sales_rollup_dirty,
+# which triggers on orders and order_detail fill with the days they touch.
+
+class SalesDaily(Base):
+    __tablename__ = 'sales_daily'
+    
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False)
+    revenue = Column(DECIMAL, nullable=False)
+
+class ProductSalesDaily(Base):
+    __tablename__ = 'product_sales_daily'
+    
+    day = Column(Date, primary_key=True)
+    # no foreign key: like sales_daily, a day's rows outlive deleted products
+    product_id = Column(Integer, primary_key=True, index=True)
+    order_count = Column(Integer, nullable=False)
+    quantity = Column(BigInteger, nullable=False)
+    revenue = Column(DECIMAL, nullable=False)
+
+class SalesRollupDirty(Base):
+    __tablename__ = 'sales_rollup_dirty'
+    
+    # append-only so concurrent writers never contend on a marker row
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
@@ -0,0 +1,26 @@
+"""Refresh the sales rollups; meant to be run from cron.
+
+    python -m analytics.refresh          # days changed since the last run
+    python -m analytics.refresh --full   # rebuild every day
+"""
+import argparse
+
+from database import SessionLocal
+from analytics import controllers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = controllers.refresh_rollups(args.full, db=db)
+    finally:
+        db.close()
+    print(f"refreshed {result.days} day(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from database import AnySession, get_read_session, get_session, run
+from responses import ValidatedRoute
+from analytics import controllers
+from analytics import schemas
+from user.routes import get_current_user
+
+analytics_router = APIRouter(prefix="/analytics", tags=['Analytics'], route_class=ValidatedRoute)
+
+@analytics_router.get("/revenue", response_model=List[schemas.RevenuePoint])
+async def get_revenue(period: schemas.Period = schemas.Period.DAY, start: Optional[date] = None, end: Optional[date] = None, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_revenue, period, start, end, db=db)
+
+@analytics_router.get("/top_products", response_model=List[schemas.ProductSales])
+async def get_top_products(metric: schemas.SalesMetric = schemas.SalesMetric.REVENUE, start: Optional[date] = None, end: Optional[date] = None, limit: int = Query(controllers.TOP_PRODUCTS_LIMIT, ge=1, le=100), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_top_products, metric, start, end, limit, db=db)
+
+@analytics_router.get("/categories", response_model=List[schemas.CategorySales])
+async def get_category_sales(start: Optional[date] = None, end: Optional[date] = None, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_category_sales, start, end, db=db)
+
+@analytics_router.get("/groups", response_model=List[schemas.GroupSales])
+async def get_group_sales(start: Optional[date] = None, end: Optional[date] = None, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_group_sales, start, end, db=db)
+
+@analytics_router.post("/refresh", response_model=schemas.RollupRefresh)
+async def refresh_rollups(full: bool = False, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
+    return await run(controllers.refresh_rollups, full, db=db)
@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+class Period(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class SalesMetric(str, Enum):
+    QUANTITY = "quantity"
+    REVENUE = "revenue"
+
+class RevenuePoint(BaseModel):
+    period_start: date
+    order_count: int
+    revenue: Decimal
+
+class ProductSales(BaseModel):
+    product_id: int
+    # None once the product has been deleted
+    name: Optional[str] = None
+    order_count: int
+    quantity: int
+    revenue: Decimal
+
+class CategorySales(BaseModel):
+    category_id: int
+    name: str
+    group_id: int
+    quantity: int
+    revenue: Decimal
+
+class GroupSales(BaseModel):
+    group_id: int
+    name: str
+    quantity: int
+    revenue: Decimal
+
+class RollupRefresh(BaseModel):
+    days: int
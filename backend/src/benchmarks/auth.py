@@ -0,0 +1,49 @@
+"""Per-request bearer token verification overhead, cold and cached.
+
+Run from backend/src with SECRET_KEY and ALGORITHM set:
+
+    python -m benchmarks.auth --requests 20000
+
+"cold" clears the token cache before every call, which is what every
+request paid before verified tokens were cached; "cached" is the steady
+state for a client reusing its token.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+from user import validation
+
+
+def measure(token: str, requests: int, cold: bool) -> list:
+    async def loop():
+        timings = []
+        for _ in range(requests):
+            if cold:
+                validation.token_cache.clear()
+            start = time.perf_counter()
+            await validation.validate_token(token)
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        return timings
+    return asyncio.run(loop())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = validation.create_access_token(
+        {"sub": "bench@example.com", "role": "CUSTOMER", "uid": 1},
+        expires_delta=timedelta(minutes=validation.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    for label, cold in (("cold", True), ("cached", False)):
+        timings = sorted(measure(token, args.requests, cold))
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"{label:7} p50={statistics.median(timings):8.2f}us p99={p99:8.2f}us mean={statistics.fmean(timings):8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+
+Exits with status 1 when a scenario's p95 grows by more than --threshold
+percent or it issues more queries per request than before.
+"""
+import argparse
+import json
+import sys
+
+
+def change(before, after) -> str:
+    if before is None or after is None:
+        return "n/a"
+    if not before:
+        return f"{after:+.2f}"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed p95 growth in percent")
+    args = parser.parse_args()
+
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+
+    if before["meta"]["dataset"] != after["meta"]["dataset"]:
+        print(f"warning: datasets differ: {before['meta']['dataset']} vs {after['meta']['dataset']}")
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    print(f"{'scenario':20} {'p50':>18} {'p95':>18} {'p99':>18} {'req/s':>16} {'queries':>12}")
+
+    regressions = []
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            print(f"{name:20} (new)")
+            continue
+        print(
+            f"{name:20} "
+            + " ".join(f"{new[key]:9.2f} {change(old[key], new[key]):>8}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+            + f" {new['throughput_rps']:7.1f} {change(old['throughput_rps'], new['throughput_rps']):>8}"
+            + f" {new['queries_per_request']!s:>5} {change(old['queries_per_request'], new['queries_per_request']):>6}"
+        )
+        if old["p95_ms"] and (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > args.threshold:
+            regressions.append(f"{name}: p95 {old['p95_ms']}ms -> {new['p95_ms']}ms")
+        if old["queries_per_request"] is not None and new["queries_per_request"] is not None and new["queries_per_request"] > old["queries_per_request"]:
+            regressions.append(f"{name}: queries per request {old['queries_per_request']} -> {new['queries_per_request']}")
+
+    if regressions:
+        print("\nregressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Drive the API at fixed concurrency and record latency and query counts.
+
+Run from backend/src after `python -m benchmarks.seed`:
+
+    python -m benchmarks.run --concurrency 16 --requests 2000
+    python -m benchmarks.run --base-url http://localhost:8000 --output before.json
+
+By default requests go through the real application in-process (httpx's ASGI
+transport), so routing, validation, serialization and the database are all
+exercised without a network hop. With --base-url they go to a running server,
+which must have a single worker for the query counts to be meaningful.
+
+Queries per request are read from the server's /metrics endpoint. Results
+are written as JSON, to diff with `python -m benchmarks.compare`.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks import seed as bench_seed
+from database import DB_ASYNC, SessionLocal
+from user import validation
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+SEARCH_TERMS = ["ca phe", "dien thoai", "banh", "sua", "giay", "tra"]
+
+
+def load_ids(db, query: str, limit: int = 10_000) -> list:
+    return list(db.execute(text(f"{query} ORDER BY random() LIMIT {limit}")).scalars())
+
+
+def build_scenarios(db, writes: bool) -> list:
+    # (name, method, route template as reported in /metrics, request factory)
+    users = load_ids(db, "SELECT id FROM users WHERE email LIKE 'bench-%'")
+    products = load_ids(db, "SELECT id FROM products WHERE image = 'bench'")
+    orders = load_ids(db, "SELECT o.id FROM orders o JOIN users u ON u.id = o.user_id WHERE u.email LIKE 'bench-%'")
+    transactions = load_ids(db, "SELECT t.id FROM transactions t JOIN users u ON u.id = t.user_id WHERE u.email LIKE 'bench-%'")
+    if not (users and products and orders and transactions):
+        raise SystemExit("no benchmark data, run `python -m benchmarks.seed` first")
+    today = date.today()
+
+    def month_range():
+        start = today - timedelta(days=random.randint(30, 330))
+        return {"start_date": start.isoformat(), "end_date": (start + timedelta(days=30)).isoformat(), "limit": 50}
+
+    scenarios = [
+        ("product_list", "GET", "/api/product", lambda: ("/api/product", {"params": {"limit": 50}})),
+        ("product_detail", "GET", "/api/product/{product_id}", lambda: (f"/api/product/{random.choice(products)}", {})),
+        ("product_search", "POST", "/api/product/search", lambda: ("/api/product/search", {"json": {"product_name": random.choice(SEARCH_TERMS)}, "params": {"limit": 20}})),
+        ("group_list", "GET", "/api/group", lambda: ("/api/group", {})),
+        ("order_list", "GET", "/api/order", lambda: ("/api/order", {"params": {"limit": 50}})),
+        ("order_detail", "GET", "/api/order/{order_id}", lambda: (f"/api/order/{random.choice(orders)}", {})),
+        ("order_date_range", "GET", "/api/order/date_range", lambda: ("/api/order/date_range", {"params": month_range()})),
+        ("order_lines", "GET", "/api/order_detail/{order_id}", lambda: (f"/api/order_detail/{random.choice(orders)}", {})),
+        ("user_detail", "GET", "/api/user/user_id/{user_id}", lambda: (f"/api/user/user_id/{random.choice(users)}", {})),
+        ("user_orders", "GET", "/api/user/user_id/{user_id}/orders", lambda: (f"/api/user/user_id/{random.choice(users)}/orders", {"params": {"limit": 20}})),
+        ("user_transactions", "GET", "/api/user/user_id/{user_id}/transactions", lambda: (f"/api/user/user_id/{random.choice(users)}/transactions", {"params": {"limit": 20}})),
+        ("transaction_list", "GET", "/api/transaction", lambda: ("/api/transaction", {"params": {"limit": 50}})),
+        ("transaction_detail", "GET", "/api/transaction/{transaction_id}", lambda: (f"/api/transaction/{random.choice(transactions)}", {})),
+    ]
+    if writes:
+        token = validation.create_access_token({"sub": "bench-1@example.com", "role": "admin", "uid": users[0]}, timedelta(hours=1))
+        headers = {"Authorization": f"Bearer {token}"}
+        # disjoint samples, so no update targets a line deleted earlier in the run
+        lines = load_ids(db, "SELECT d.id FROM order_detail d JOIN orders o ON o.id = d.order_id JOIN users u ON u.id = o.user_id WHERE u.email LIKE 'bench-%'", limit=20_000)
+        updated_lines, deleted_lines = lines[::2], lines[1::2]
+        transaction_owners = db.execute(text(
+            "SELECT t.id, t.user_id FROM transactions t JOIN users u ON u.id = t.user_id WHERE u.email LIKE 'bench-%' ORDER BY random() LIMIT 10000"
+        )).all()
+
+        def transaction_update(transaction_id, user_id):
+            return f"/api/transaction/{transaction_id}", {"headers": headers, "json": {
+                "user_id": user_id, "new_amount": "1", "transaction_type": "DEPOSIT", "updated_at": datetime.now(timezone.utc).isoformat(),
+            }}
+
+        scenarios += [
+            ("transaction_create", "POST", "/api/transaction", lambda: ("/api/transaction", {"headers": headers, "json": {
+                "user_id": random.choice(users), "new_amount": "1", "transaction_type": "DEPOSIT",
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }})),
+            ("checkout", "POST", "/api/order/checkout", lambda: ("/api/order/checkout", {"json": {
+                "user_id": random.choice(users), "items": [{"product_id": product_id, "quantity": 1} for product_id in random.sample(products, 3)],
+            }})),
+            ("product_update", "PUT", "/api/product/{product_id}", lambda: (f"/api/product/{random.choice(products)}", {"json": {
+                "price": random.randint(1, 500), "updated_at": datetime.now(timezone.utc).isoformat(),
+            }})),
+            ("order_line_update", "PUT", "/api/order_detail/{order_detail_id}", lambda: (f"/api/order_detail/{random.choice(updated_lines)}", {"json": {
+                "product_id": random.choice(products), "quantity": random.randint(1, 5), "unit_price": "10", "updated_at": datetime.now(timezone.utc).isoformat(),
+            }})),
+            # each line is deleted once; a run longer than the sample counts the rest as errors
+            ("order_line_delete", "DELETE", "/api/order_detail/{order_detail_id}", lambda: (f"/api/order_detail/{deleted_lines.pop() if deleted_lines else 0}", {})),
+            ("transaction_update", "PUT", "/api/transaction/{transaction_id}", lambda: transaction_update(*random.choice(transaction_owners))),
+        ]
+    return scenarios
+
+
+STATEMENT_SERIES = re.compile(r'^db_statements_per_request_(sum|count)\{method="([^"]*)",route="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+
+async def statement_totals(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/metrics")
+    totals = {}
+    for kind, method, route, value in STATEMENT_SERIES.findall(response.text):
+        totals.setdefault((method, route), {"sum": 0.0, "count": 0.0})[kind] = float(value)
+    return totals
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    name, method, route, make_request = scenario
+    for _ in range(warmup):
+        path, options = make_request()
+        await client.request(method, path, **options)
+
+    before = (await statement_totals(client)).get((method, route), {"sum": 0.0, "count": 0.0})
+    timings = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            path, options = make_request()
+            start = time.perf_counter()
+            response = await client.request(method, path, **options)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = (await statement_totals(client)).get((method, route), {"sum": 0.0, "count": 0.0})
+
+    timings.sort()
+    measured = after["count"] - before["count"]
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "throughput_rps": round(len(timings) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries_per_request": round((after["sum"] - before["sum"]) / measured, 2) if measured else None,
+    }
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args, scenarios: list) -> dict:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+    results = {}
+    async with client:
+        for scenario in scenarios:
+            if args.only and scenario[0] not in args.only:
+                continue
+            results[scenario[0]] = result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+            print(f"{scenario[0]:20} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms p99={result['p99_ms']:8.2f}ms "
+                  f"{result['throughput_rps']:8.1f} req/s queries={result['queries_per_request']} errors={result['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="requests per scenario before measuring")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--writes", action="store_true", help="include scenarios that create, update and delete rows")
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--seed", action="store_true", help="seed the dataset before running")
+    parser.add_argument("--output", type=Path, help=f"defaults to {RESULTS_DIR.name}/<commit>.json")
+    bench_seed.add_arguments(parser)
+    args = parser.parse_args()
+
+    random.seed(0)
+    db = SessionLocal()
+    try:
+        if args.seed:
+            bench_seed.seed(db, args.users, args.products, args.orders, args.lines_per_order, args.transactions)
+        scenarios = build_scenarios(db, args.writes)
+        dataset = bench_seed.dataset(db)
+    finally:
+        db.close()
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": args.base_url or "in-process",
+            "db_async": DB_ASYNC,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "dataset": dataset,
+        },
+        "scenarios": asyncio.run(run(args, scenarios)),
+    }
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Product search latency against a seeded catalog.
+
+Run from backend/src after `alembic upgrade head`:
+
+    python -m benchmarks.search --products 1000000
+
+Seeding is skipped when the catalog already holds enough benchmark rows.
+"""
+import argparse
+import statistics
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from database import SessionLocal
+from product import controllers, schemas
+import pagination
+
+WORDS = "ARRAY['Áo', 'thun', 'cà phê', 'bánh', 'sữa', 'nước', 'giày', 'điện thoại', 'máy tính', 'gạo', 'trà', 'kẹo']"
+
+QUERIES = [
+    schemas.ProductSearch(product_name="ca phe"),
+    schemas.ProductSearch(product_name="dien thoai", min_price=100),
+    schemas.ProductSearch(supplier="nha cung cap 42"),
+    schemas.ProductSearch(category_name="category 7", quantity=True),
+    schemas.ProductSearch(group_name="group 3", product_name="banh"),
+    schemas.ProductSearch(product_name="zzz-no-match"),
+]
+
+
+def seed(db, products: int, groups: int = 50, categories: int = 500):
+    existing = db.execute(text("SELECT count(*) FROM products WHERE image = 'bench'")).scalar()
+    if existing >= products:
+        return
+    db.execute(text(
+        "INSERT INTO product_group (name) SELECT 'Group ' || g FROM generate_series(1, :n) g "
+        "ON CONFLICT (name) DO NOTHING"
+    ), {"n": groups})
+    db.execute(text(
+        "INSERT INTO product_category (name, group_id) "
+        "SELECT 'Category ' || c, g.ids[1 + c % array_length(g.ids, 1)] "
+        "FROM generate_series(1, :n) c, (SELECT array_agg(id) AS ids FROM product_group WHERE name LIKE 'Group %') g "
+        "ON CONFLICT (name) DO NOTHING"
+    ), {"n": categories})
+    db.execute(text(
+        "INSERT INTO products (name, image, price, discount_price, quantity, description, supplier, group_id, category_id) "
+        f"SELECT w[1 + n % 12] || ' ' || w[1 + (n / 12) % 12] || ' ' || n, 'bench', "
+        "(n % 1000) + 0.99, CASE WHEN n % 5 = 0 THEN (n % 1000) * 0.9 ELSE 0 END, n % 50, 'benchmark product', "
+        "'Nhà cung cấp ' || (n % 500), c.group_ids[1 + n % array_length(c.ids, 1)], c.ids[1 + n % array_length(c.ids, 1)] "
+        f"FROM generate_series(:start, :stop) n, (SELECT {WORDS} AS w) words, "
+        "(SELECT array_agg(id ORDER BY id) AS ids, array_agg(group_id ORDER BY id) AS group_ids "
+        "FROM product_category WHERE name LIKE 'Category %') c"
+    ), {"start": existing + 1, "stop": products})
+    db.commit()
+    db.execute(text("ANALYZE products"))
+    db.execute(text("ANALYZE product_category"))
+    db.execute(text("ANALYZE product_group"))
+
+
+def run(db, rounds: int, limit: int):
+    params = pagination.PageParams(limit=limit)
+    for form in QUERIES:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            try:
+                controllers.search_products(form, params, db)
+            except HTTPException:
+                pass
+            timings.append((time.perf_counter() - start) * 1000)
+            db.rollback()
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+        print(f"{form.model_dump(exclude_none=True)!s:60} p50={statistics.median(timings):8.2f}ms p95={p95:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=pagination.DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed(db, args.products)
+        run(db, args.rounds, args.limit)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Seed a synthetic dataset for the API benchmarks.
+
+Run from backend/src after `alembic upgrade head`:
+
+    python -m benchmarks.seed --users 10000 --products 100000 --orders 200000
+
+Benchmark rows are recognisable (users `bench-N@example.com`, products with
+image 'bench') and seeding only adds what is missing, so it can be re-run
+with larger sizes.
+"""
+import argparse
+
+from sqlalchemy import text
+
+from benchmarks import search
+from database import SessionLocal
+from user import validation
+
+BENCH_PASSWORD = "benchmark"
+BENCH_WALLET_BALANCE = 1_000_000_000
+
+BENCH_USERS = "SELECT array_agg(id ORDER BY id) AS ids FROM users WHERE email LIKE 'bench-%'"
+BENCH_PRODUCTS = "SELECT array_agg(id ORDER BY id) AS ids, array_agg(price ORDER BY id) AS prices FROM products WHERE image = 'bench'"
+
+
+def _count(db, query: str) -> int:
+    return db.execute(text(query)).scalar()
+
+
+def seed_users(db, users: int):
+    existing = _count(db, "SELECT count(*) FROM users WHERE email LIKE 'bench-%'")
+    if existing >= users:
+        return
+    db.execute(text(
+        "INSERT INTO users (email, password, username, phone_number, role, wallet_balance) "
+        "SELECT 'bench-' || n || '@example.com', :password, 'bench_user_' || n, lpad((n % 10000000000)::text, 10, '0'), "
+        "CASE WHEN n % 100 = 0 THEN 'admin' ELSE 'CUSTOMER' END, :balance "
+        "FROM generate_series(:start, :stop) n"
+    ), {"password": validation.get_password_hash(BENCH_PASSWORD), "balance": BENCH_WALLET_BALANCE, "start": existing + 1, "stop": users})
+    db.commit()
+
+
+def seed_orders(db, orders: int, lines_per_order: int, days: int):
+    existing = _count(db, "SELECT count(*) FROM orders o JOIN users u ON u.id = o.user_id WHERE u.email LIKE 'bench-%'")
+    if existing >= orders:
+        return
+    # order dates rise with the id, as they do for real traffic
+    db.execute(text(
+        f"WITH u AS ({BENCH_USERS}), p AS ({BENCH_PRODUCTS}), new_orders AS ("
+        "INSERT INTO orders (user_id, total_amount, order_date) "
+        "SELECT u.ids[1 + (n * 7919) % array_length(u.ids, 1)], 0, "
+        "now() - make_interval(days => :days) + (n - 1) * (make_interval(days => :days) / :stop) "
+        "FROM generate_series(:start, :stop) n, u RETURNING id) "
+        "INSERT INTO order_detail (order_id, product_id, quantity, unit_price) "
+        "SELECT o.id, p.ids[1 + (o.id * 31 + l * 7919) % array_length(p.ids, 1)], 1 + (o.id + l) % 3, "
+        "p.prices[1 + (o.id * 31 + l * 7919) % array_length(p.ids, 1)]::numeric "
+        "FROM new_orders o, generate_series(1, :lines) l, p"
+    ), {"start": existing + 1, "stop": orders, "lines": lines_per_order, "days": days})
+    db.execute(text(
+        "UPDATE orders o SET total_amount = s.total "
+        "FROM (SELECT order_id, sum(quantity * unit_price) AS total FROM order_detail GROUP BY order_id) s "
+        "WHERE o.id = s.order_id AND o.total_amount = 0"
+    ))
+    db.commit()
+
+
+def seed_transactions(db, transactions: int, days: int):
+    existing = _count(db, "SELECT count(*) FROM transactions t JOIN users u ON u.id = t.user_id WHERE u.email LIKE 'bench-%'")
+    if existing >= transactions:
+        return
+    db.execute(text(
+        f"WITH u AS ({BENCH_USERS}) "
+        "INSERT INTO transactions (user_id, old_amount, new_amount, total_amount, transaction_type, created_at) "
+        "SELECT u.ids[1 + (n * 104729) % array_length(u.ids, 1)], 0, 1 + n % 500, 1 + n % 500, "
+        "CASE WHEN n % 3 = 0 THEN 'WITHDRAW' ELSE 'DEPOSIT' END, "
+        "now() - make_interval(days => :days) + (n - 1) * (make_interval(days => :days) / :stop) "
+        "FROM generate_series(:start, :stop) n, u"
+    ), {"start": existing + 1, "stop": transactions, "days": days})
+    db.commit()
+
+
+def seed(db, users: int, products: int, orders: int, lines_per_order: int, transactions: int, days: int = 365):
+    search.seed(db, products)
+    seed_users(db, users)
+    seed_orders(db, orders, lines_per_order, days)
+    seed_transactions(db, transactions, days)
+    for table in ("users", "orders", "order_detail", "transactions"):
+        db.execute(text(f"ANALYZE {table}"))
+
+
+def dataset(db) -> dict:
+    return {
+        "users": _count(db, "SELECT count(*) FROM users"),
+        "products": _count(db, "SELECT count(*) FROM products"),
+        "orders": _count(db, "SELECT count(*) FROM orders"),
+        "order_details": _count(db, "SELECT count(*) FROM order_detail"),
+        "transactions": _count(db, "SELECT count(*) FROM transactions"),
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--lines-per-order", type=int, default=3)
+    parser.add_argument("--transactions", type=int, default=200_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed(db, args.users, args.products, args.orders, args.lines_per_order, args.transactions)
+        print(dataset(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
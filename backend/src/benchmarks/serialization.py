@@ -0,0 +1,81 @@
+"""Time response encoding for a large product listing.
+
+Run from backend/src; no database is needed:
+
+    python -m benchmarks.serialization --rows 10000
+
+Builds validated ProductResponse models (with their nested category and
+group, as the controllers return them) and encodes them the way FastAPI does
+for a route with response_model, i.e. dump, validate against the response
+model again, then json.dumps, and the way FastJSONResponse does, in one
+pydantic-core pass. Both outputs are checked to decode to the same value.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from product import schemas
+from responses import FastJSONResponse
+
+
+def build_rows(rows: int) -> List[schemas.ProductResponse]:
+    now = datetime.now(timezone.utc)
+    groups = [{"id": group, "name": f"group {group}", "created_at": now, "updated_at": now} for group in range(20)]
+    categories = [
+        {"id": category, "name": f"category {category}", "group_id": category % 20, "product_group": groups[category % 20], "created_at": now, "updated_at": now}
+        for category in range(200)
+    ]
+    return [
+        schemas.ProductResponse.model_validate({
+            "id": row, "name": f"product {row}", "image": f"https://example.com/{row}.jpg", "price": 10 + row % 500,
+            "discount_price": row % 7, "quantity": row % 100, "description": "benchmark product " * 4, "supplier": f"supplier {row % 50}",
+            "group_id": row % 200 % 20, "category_id": row % 200, "product_category": categories[row % 200], "created_at": now, "updated_at": now,
+        })
+        for row in range(rows)
+    ]
+
+
+def fastapi_default(field, rows) -> bytes:
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content).body
+
+
+def single_pass(field, rows) -> bytes:
+    return FastJSONResponse(rows).body
+
+
+def measure(encode, field, rows, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(field, rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    field = APIRoute("/product", lambda: None, response_model=List[schemas.ProductResponse]).response_field
+    if json.loads(fastapi_default(field, rows)) != json.loads(single_pass(field, rows)):
+        raise SystemExit("encoders disagree")
+
+    print(f"{args.rows} ProductResponse rows, {len(single_pass(field, rows)) / 1024 / 1024:.1f} MiB of JSON")
+    for name, encode in (("response_model + JSONResponse", fastapi_default), ("FastJSONResponse", single_pass)):
+        timings = measure(encode, field, rows, args.repeat)
+        print(f"{name:30} median={statistics.median(timings):8.1f}ms min={min(timings):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
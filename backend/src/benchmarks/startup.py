@@ -0,0 +1,93 @@
+"""Measure time-to-first-request for a freshly started worker.
+
+Run from backend/src:
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --ready   # also wait for /health/ready
+
+Each run starts `uvicorn main:app` with a single worker and times how long
+it takes until /health/live (and optionally /health/ready) first answers
+200. This is the delay autoscaling and rolling restarts pay per worker.
+Exits with status 1 when the median exceeds --target seconds.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+# seconds from process start to the first live response, per worker
+TARGET_SECONDS = 1.5
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(client: httpx.Client, url: str, process: subprocess.Popen, deadline: float) -> bool:
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            if client.get(url).status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    return False
+
+
+def run_once(ready: bool, timeout: float) -> dict:
+    port = free_port()
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SRC_DIR, env=os.environ.copy(),
+    )
+    result = {"live_s": None, "ready_s": None}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            deadline = start + timeout
+            if wait_for(client, "/health/live", process, deadline):
+                result["live_s"] = time.monotonic() - start
+                if ready and wait_for(client, "/health/ready", process, deadline):
+                    result["ready_s"] = time.monotonic() - start
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ready", action="store_true", help="also time the first ready response")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait per run")
+    parser.add_argument("--target", type=float, default=TARGET_SECONDS, help="allowed median seconds to the first live response")
+    args = parser.parse_args()
+
+    results = [run_once(args.ready, args.timeout) for _ in range(args.runs)]
+    for key in ("live_s", "ready_s") if args.ready else ("live_s",):
+        timings = [result[key] for result in results if result[key] is not None]
+        if not timings:
+            print(f"{key[:-2]:6} never answered within {args.timeout}s")
+            continue
+        print(f"{key[:-2]:6} median={statistics.median(timings):.3f}s min={min(timings):.3f}s max={max(timings):.3f}s ({len(timings)}/{args.runs} runs)")
+
+    live = [result["live_s"] for result in results if result["live_s"] is not None]
+    if len(live) < args.runs or statistics.median(live) > args.target:
+        print(f"target: first live response within {args.target}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Concurrent wallet deposits and withdrawals against a single user.
+
+Run from backend/src after `alembic upgrade head`:
+
+    python -m benchmarks.wallet_stress --workers 32 --operations 500
+
+Every worker uses its own session, as concurrent requests would. The run
+fails if the final balance or the ledger disagrees with the operations that
+succeeded, or if a replayed idempotency key is applied twice.
+"""
+import argparse
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import func
+
+from database import SessionLocal
+from user import controllers, models, schemas
+
+
+def create_user(db) -> int:
+    user = models.User(
+        email=f"wallet-stress-{uuid.uuid4().hex[:12]}@example.com",
+        password="x",
+        username="walletstress",
+        phone_number="0000000000",
+        role="CUSTOMER",
+        wallet_balance=0,
+    )
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def transact(user_id: int, transaction_type: schemas.TransactionType, amount: Decimal, idempotency_key: str = None):
+    db = SessionLocal()
+    try:
+        transaction = schemas.TransactionCreate(
+            user_id=user_id,
+            new_amount=amount,
+            transaction_type=transaction_type,
+            created_at=datetime.now(timezone.utc),
+        )
+        return controllers.create_transaction(transaction, db=db, idempotency_key=idempotency_key)
+    except HTTPException:
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    user_id = create_user(db)
+
+    operations = [
+        (schemas.TransactionType.DEPOSIT if rng.random() < 0.6 else schemas.TransactionType.WITHDRAW, Decimal(rng.randint(1, 100)))
+        for _ in range(args.operations)
+    ]
+    replayed_key = uuid.uuid4().hex
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(transact, user_id, transaction_type, amount) for transaction_type, amount in operations]
+        replays = [pool.submit(transact, user_id, schemas.TransactionType.DEPOSIT, Decimal(1), replayed_key) for _ in range(args.workers)]
+        results = [future.result() for future in futures]
+        replay_results = [future.result() for future in replays]
+    elapsed = time.perf_counter() - start
+
+    applied = [result for result in results if result is not None]
+    expected = sum(
+        (result.new_amount if result.transaction_type == schemas.TransactionType.DEPOSIT else -result.new_amount) for result in applied
+    ) + Decimal(1)
+
+    db.expire_all()
+    balance = db.query(models.User.wallet_balance).filter(models.User.id == user_id).scalar()
+    ledger = db.query(models.Transaction).filter(models.Transaction.user_id == user_id).order_by(models.Transaction.id).all()
+    replay_rows = db.query(func.count()).select_from(models.Transaction).filter(
+        models.Transaction.user_id == user_id, models.Transaction.idempotency_key == replayed_key
+    ).scalar()
+
+    print(f"{len(operations) + len(replays)} requests in {elapsed:.2f}s with {args.workers} workers, "
+          f"{len(applied)} applied, {len(operations) - len(applied)} rejected")
+    print(f"balance={balance} expected={expected} ledger rows={len(ledger)}")
+
+    assert balance == expected, "final balance does not match the applied transactions"
+    assert balance >= 0, "balance went negative"
+    assert replay_rows == 1, f"idempotency key applied {replay_rows} times"
+    assert len({result.id for result in replay_results if result is not None}) == 1, "replays returned different transactions"
+    assert len(ledger) == len(applied) + 1, "ledger row count does not match the applied transactions"
+    # ids are drawn while the user row is locked, so id order is the order the
+    # balance changes were applied and each row must start where the last ended
+    previous_total = Decimal(0)
+    for row in ledger:
+        delta = row.new_amount if row.transaction_type == schemas.TransactionType.DEPOSIT.value else -row.new_amount
+        assert row.old_amount == previous_total, f"transaction {row.id} did not start from the previous balance"
+        assert row.old_amount + delta == row.total_amount, f"transaction {row.id} does not chain old_amount to total_amount"
+        previous_total = row.total_amount
+    print("ok")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from os import environ
+from typing import Optional
+
+from dotenv import load_dotenv
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(environ.get('CACHE_MAX_ENTRIES', 10000))
+CACHE_TTL = float(environ.get('CACHE_TTL', 30))
+CACHE_SHARED_TTL = float(environ.get('CACHE_SHARED_TTL', 600))
+CACHE_REDIS_URL = environ.get('CACHE_REDIS_URL')
+CACHE_REDIS_TIMEOUT = float(environ.get('CACHE_REDIS_TIMEOUT', 0.1))
+# After an invalidation the key refuses repopulation for this many seconds, so
+# a read that started before the write committed, or was served by a lagging
+# replica, cannot put the old row back in the cache.
+CACHE_INVALIDATION_HOLD = float(environ.get('CACHE_INVALIDATION_HOLD', environ.get('DB_REPLICA_MAX_LAG', 5) if environ.get('DB_REPLICA_URLS') else 1))
+# Invalidations only reach the local tier of the worker that made the write,
+# so with a shared tier the other workers' copies are kept this briefly.
+CACHE_SHARED_LOCAL_TTL = float(environ.get('CACHE_SHARED_LOCAL_TTL', 1))
+
+TOMBSTONE = b'\x00'
+
+
+class TTLCache:
+    # In-process LRU whose entries also expire after a per-entry TTL
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key, value, ttl):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    # Shared tier. Errors are logged and treated as misses so a Redis outage
+    # degrades to database reads instead of failing requests.
+    def __init__(self, url: str, ttl: float = CACHE_SHARED_TTL, prefix: str = 'store:'):
+        if redis is None:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url, socket_timeout=CACHE_REDIS_TIMEOUT, socket_connect_timeout=CACHE_REDIS_TIMEOUT)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            return self.client.get(self.prefix + key)
+        except redis.RedisError as error:
+            logger.warning("cache get failed for %s: %s", key, error)
+            return None
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        try:
+            self.client.set(self.prefix + key, value, px=max(1, int((self.ttl if ttl is None else ttl) * 1000)))
+        except redis.RedisError as error:
+            logger.warning("cache set failed for %s: %s", key, error)
+
+    def add(self, key, value, ttl: Optional[float] = None) -> Optional[bool]:
+        try:
+            return bool(self.client.set(self.prefix + key, value, px=max(1, int((self.ttl if ttl is None else ttl) * 1000)), nx=True))
+        except redis.RedisError as error:
+            logger.warning("cache add failed for %s: %s", key, error)
+            return None
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except redis.RedisError as error:
+            logger.warning("cache delete failed for %s: %s", keys, error)
+
+
+class TieredCache:
+    def __init__(self, local: TTLCache, shared: Optional[RedisCache] = None, hold: float = CACHE_INVALIDATION_HOLD):
+        self.local = local
+        self.shared = shared
+        self.hold = hold
+
+    def get(self, key) -> Optional[bytes]:
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return None if value == TOMBSTONE else value
+
+    def add(self, key, value: bytes):
+        # Populate after a miss; a held (recently invalidated) key is left alone
+        if self.shared is not None and self.shared.add(key, value) is False:
+            return
+        self.local.add(key, value)
+
+    def invalidate(self, *keys):
+        for tier in filter(None, (self.local, self.shared)):
+            for key in keys:
+                tier.set(key, TOMBSTONE, ttl=self.hold)
+
+
+catalog = TieredCache(
+    TTLCache(ttl=min(CACHE_TTL, CACHE_SHARED_LOCAL_TTL)) if CACHE_REDIS_URL else TTLCache(),
+    RedisCache(CACHE_REDIS_URL) if CACHE_REDIS_URL else None,
+)
@@ -1,24 +1,133 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from typing import Union
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from pooling import TimedAsyncAdaptedQueuePool, TimedQueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from os import environ  
+from os import environ
 
 DB_USER = environ.get('DB_USER')
 DB_PASSWORD = environ.get('DB_PASSWORD')
 DB_HOST = environ.get('DB_HOST')
 DB_PORT = environ.get('DB_PORT')
 DB_NAME = environ.get('DB_NAME')
+DB_ASYNC = environ.get('DB_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+
+DB_POOL_SIZE = int(environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+DB_STATEMENT_TIMEOUT = int(environ.get('DB_STATEMENT_TIMEOUT', 0))
+
+DB_REPLICA_URLS = [url.strip() for url in environ.get('DB_REPLICA_URLS', '').split(',') if url.strip()]
+DB_REPLICA_MAX_LAG = float(environ.get('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
 
 SQLALCHEMY_DATABASE_URL = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+SQLALCHEMY_ASYNC_DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def engine_options(is_async: bool = False) -> dict:
+    options = {
+        'poolclass': TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT:
+        if is_async:
+            options['connect_args'] = {'server_settings': {'statement_timeout': str(DB_STATEMENT_TIMEOUT)}}
+        else:
+            options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'}
+    return options
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options())
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async stack is only built when selected, so asyncpg stays optional
+# for deployments that run the sync path.
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **engine_options(is_async=True)) if DB_ASYNC else None
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False) if DB_ASYNC else None
+
+AnySession = Union[Session, AsyncSession]
+
+# Seconds the replica is behind the primary; 0 when it has replayed all WAL it received
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = create_engine(url, **engine_options())
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self.async_session_factory = None
+        if DB_ASYNC:
+            async_url = self.engine.url.set(drivername='postgresql+asyncpg')
+            self.async_engine = create_async_engine(async_url, **engine_options(is_async=True))
+            self.async_session_factory = async_sessionmaker(self.async_engine, autoflush=False)
+        self.lag = None
+        self.checked_at = float('-inf')
+
+    def _check_due(self) -> bool:
+        if time.monotonic() - self.checked_at < DB_REPLICA_LAG_CHECK_INTERVAL:
+            return False
+        # claim the check up front so concurrent requests keep the cached value
+        self.checked_at = time.monotonic()
+        return True
+
+    def _lag_ok(self) -> bool:
+        return self.lag is not None and self.lag <= DB_REPLICA_MAX_LAG
+
+    def is_available(self) -> bool:
+        if self._check_due():
+            try:
+                with self.engine.connect() as connection:
+                    self.lag = connection.execute(REPLICA_LAG_QUERY).scalar()
+            except SQLAlchemyError:
+                self.lag = None
+        return self._lag_ok()
+
+    async def is_available_async(self) -> bool:
+        if self._check_due():
+            try:
+                async with self.async_engine.connect() as connection:
+                    self.lag = (await connection.execute(REPLICA_LAG_QUERY)).scalar()
+            except SQLAlchemyError:
+                self.lag = None
+        return self._lag_ok()
+
+replicas = [Replica(url) for url in DB_REPLICA_URLS]
+_replica_counter = itertools.count()
+
+def _replica_rotation():
+    if not replicas:
+        return []
+    start = next(_replica_counter) % len(replicas)
+    return replicas[start:] + replicas[:start]
+
+# Engines whose pools are reported by the monitoring endpoints
+engines = {'primary': engine}
+if DB_ASYNC:
+    engines['primary_async'] = async_engine
+for index, replica in enumerate(replicas):
+    engines[f'replica_{index}'] = replica.engine
+    if DB_ASYNC:
+        engines[f'replica_{index}_async'] = replica.async_engine
+
 Base = declarative_base()
 
 # Dependency
@@ -27,4 +136,48 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency: an AsyncSession when DB_ASYNC is set, a sync Session otherwise
+async def get_session():
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+def read_session() -> Session:
+    # Round-robin over replicas within the lag budget, falling back to the primary
+    for replica in _replica_rotation():
+        if replica.is_available():
+            return replica.session_factory()
+    return SessionLocal()
+
+# Dependency: like get_session, but bound to a replica for read-only routes
+async def get_read_session():
+    if DB_ASYNC:
+        session_factory = AsyncSessionLocal
+        for replica in _replica_rotation():
+            if await replica.is_available_async():
+                session_factory = replica.async_session_factory
+                break
+        async with session_factory() as session:
+            yield session
+        return
+    db = await run_in_threadpool(read_session) if replicas else SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+async def run(controller, *args, db: AnySession, **kwargs):
+    # Controllers are written against the sync Session API. On the async path
+    # they run inside AsyncSession.run_sync, where every statement awaits
+    # asyncpg on the event loop instead of blocking a threadpool worker.
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: controller(*args, db=session, **kwargs))
+    return await run_in_threadpool(controller, *args, db=db, **kwargs)
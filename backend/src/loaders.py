@@ -0,0 +1,49 @@
+from typing import get_args
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+# Eager-loading options per (model, response schema), derived from the nested
+# fields of the schema so that model_validate never triggers a lazy load.
+_registry = {}
+
+
+def _nested_schema(annotation):
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        schema = _nested_schema(arg)
+        if schema is not None:
+            return schema
+    return None
+
+
+def _derive_options(model, schema, parent=None, dml=False):
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in schema.model_fields.items():
+        if name not in relationships:
+            continue
+        relationship = relationships[name]
+        attribute = getattr(model, name)
+        # collections are fetched with one extra IN query, scalars are joined;
+        # UPDATE/DELETE ... RETURNING cannot join, so its first level is selectin
+        if relationship.uselist or (dml and parent is None):
+            option = parent.selectinload(attribute) if parent is not None else selectinload(attribute)
+        else:
+            option = parent.joinedload(attribute) if parent is not None else joinedload(attribute)
+        nested = _nested_schema(field.annotation)
+        children = _derive_options(relationship.mapper.class_, nested, option) if nested else []
+        options.extend(children or [option])
+    return options
+
+
+def options_for(model, schema, dml: bool = False):
+    key = (model, schema, dml)
+    if key not in _registry:
+        _registry[key] = tuple(_derive_options(model, schema, dml=dml))
+    return _registry[key]
+
+
+def query(db: Session, model, schema):
+    return db.query(model).options(*options_for(model, schema))
@@ -1,26 +1,45 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
-from database import engine, Base
+import database
+import migrations
 
 # from auth import routes
 from user import routes as user_routes
 from product import routes as product_routes
 from order import routes as order_routes
+from monitoring import routes as monitoring_routes
+from monitoring.metrics import InstrumentationMiddleware
+from responses import FastJSONResponse
+from analytics import routes as analytics_routes
 
-from user.models import User, Transaction
-from order.models import Order
-from product.models import Product, ProductGroup, ProductCategory
-
-Base.metadata.create_all(bind=engine)
+# The schema is owned by Alembic. Workers do no DDL at import or startup;
+# they only compare revisions (see DB_SCHEMA_MODE in migrations.py).
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prepare = run_in_threadpool(migrations.prepare, database.engine)
+    if migrations.DB_SCHEMA_MODE == 'create_all':
+        await prepare
+    else:
+        # the revision check only feeds /health/ready, so a slow or unreachable
+        # database does not hold up the worker's first (liveness) response
+        app.state.schema_check = asyncio.create_task(prepare)
+    yield
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
+app.add_middleware(InstrumentationMiddleware)
 app.include_router(user_routes.router, prefix="/api")
 app.include_router(user_routes.transaction_router, prefix="/api")
 app.include_router(product_routes.product_router, prefix="/api")
 app.include_router(product_routes.product_group_router, prefix="/api")
 app.include_router(product_routes.product_category_router, prefix="/api")
 app.include_router(product_routes.search_product_router, prefix="/api")
+app.include_router(product_routes.catalog_router, prefix="/api")
 app.include_router(order_routes.order_router, prefix="/api")
-app.include_router(order_routes.order_detail_router, prefix="/api")
\ No newline at end of file
+app.include_router(order_routes.order_detail_router, prefix="/api")
+app.include_router(analytics_routes.analytics_router, prefix="/api")
+app.include_router(monitoring_routes.health_router)
+app.include_router(monitoring_routes.metrics_router)
\ No newline at end of file
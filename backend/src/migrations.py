@@ -0,0 +1,75 @@
+import logging
+from os import environ
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# check: compare the database's Alembic revision with the migration scripts, no DDL
+# create_all: create missing tables from the models, for throwaway local databases only
+# skip: neither; readiness then only pings the database
+DB_SCHEMA_MODE = environ.get('DB_SCHEMA_MODE', 'check').lower()
+
+ALEMBIC_DIR = Path(__file__).resolve().parent / "alembic"
+
+_expected_heads = None
+schema_ready = False
+
+
+def expected_heads() -> set:
+    # parsed from the scripts once per process; alembic is only imported here
+    global _expected_heads
+    if _expected_heads is None:
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+        config = Config()
+        config.set_main_option("script_location", str(ALEMBIC_DIR))
+        _expected_heads = set(ScriptDirectory.from_config(config).get_heads())
+    return _expected_heads
+
+
+def _revision_problem(connection) -> Optional[str]:
+    from alembic.runtime.migration import MigrationContext
+    current = set(MigrationContext.configure(connection).get_current_heads())
+    expected = expected_heads()
+    if current != expected:
+        return f"database is at revision {', '.join(sorted(current)) or 'none'}, code expects {', '.join(sorted(expected))}; run `alembic upgrade head`"
+    return None
+
+
+def prepare(engine):
+    # Called once per worker at startup. A database that is behind or
+    # unreachable is logged rather than raised, so the worker still starts and
+    # /health/ready keeps reporting it until `check` succeeds.
+    global schema_ready
+    if DB_SCHEMA_MODE == 'create_all':
+        from database import Base
+        Base.metadata.create_all(bind=engine)
+        schema_ready = True
+    elif DB_SCHEMA_MODE == 'skip':
+        schema_ready = True
+    else:
+        problem = check(engine)
+        if problem:
+            logger.error("schema check failed: %s", problem)
+
+
+def check(engine) -> Optional[str]:
+    # None when the database is reachable and (once confirmed) at the head revision
+    global schema_ready
+    try:
+        with engine.connect() as connection:
+            if schema_ready:
+                connection.execute(text("SELECT 1"))
+                return None
+            problem = _revision_problem(connection)
+    except SQLAlchemyError as error:
+        return f"database unavailable: {error.__class__.__name__}"
+    schema_ready = problem is None
+    return problem
@@ -0,0 +1,132 @@
+"""Report unused indexes and unindexed foreign keys from Postgres statistics.
+
+Run from backend/src against a database that has seen representative load,
+e.g. after `python -m benchmarks.seed` and `python -m benchmarks.run --writes`:
+
+    python -m monitoring.advisor
+    python -m monitoring.advisor --reset   # clear the counters before a run
+
+Foreign keys are taken from the models in */models.py and checked against the
+leading column of every index in the database; the ones without an index are
+listed with their table's sequential scan counts from pg_stat_user_tables and
+the pg_stat_statements entries that mention them. Indexes without a single
+scan since the statistics were reset are listed unless they enforce a
+primary key or unique constraint.
+
+Exits with status 1 when there is anything to report.
+"""
+import argparse
+import importlib
+import re
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+from database import Base, engine
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+INDEX_USAGE = text(
+    "SELECT s.relname AS table_name, s.indexrelname AS index_name, s.idx_scan, pg_relation_size(s.indexrelid) AS size_bytes "
+    "FROM pg_stat_user_indexes s JOIN pg_index i ON i.indexrelid = s.indexrelid "
+    "WHERE s.schemaname = current_schema() AND NOT i.indisunique AND NOT i.indisprimary AND s.idx_scan <= :max_scans "
+    "ORDER BY pg_relation_size(s.indexrelid) DESC"
+)
+LEADING_COLUMNS = text(
+    "SELECT t.relname AS table_name, a.attname AS column_name "
+    "FROM pg_index i JOIN pg_class t ON t.oid = i.indrelid JOIN pg_namespace n ON n.oid = t.relnamespace "
+    "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0] "
+    "WHERE n.nspname = current_schema()"
+)
+TABLE_STATS = text(
+    "SELECT relname AS table_name, seq_scan, seq_tup_read, idx_scan, n_live_tup "
+    "FROM pg_stat_user_tables WHERE schemaname = current_schema()"
+)
+STATS_RESET = text("SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()")
+HAS_STATEMENTS = text("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+TOP_STATEMENTS = text(
+    "SELECT query, calls, total_exec_time, mean_exec_time "
+    "FROM pg_stat_statements WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+    "ORDER BY total_exec_time DESC LIMIT 500"
+)
+
+
+def load_models():
+    for models in sorted(SRC_DIR.glob("*/models.py")):
+        importlib.import_module(f"{models.parent.name}.models")
+
+
+def foreign_keys() -> list:
+    keys = set()
+    for table in Base.metadata.sorted_tables:
+        for constraint in table.foreign_key_constraints:
+            # a composite key is served by an index on its first column
+            keys.add((table.name, constraint.column_keys[0], constraint.referred_table.name))
+    return sorted(keys)
+
+
+def _mentions(query: str, table: str, column: str) -> bool:
+    return bool(re.search(rf"\b{table}\b", query) and re.search(rf"\b{column}\b", query))
+
+
+def advise(connection, max_scans: int, statements_per_key: int) -> int:
+    findings = 0
+    reset = connection.execute(STATS_RESET).scalar()
+    print(f"statistics since {reset or 'server start'}\n")
+
+    indexed = {(row.table_name, row.column_name) for row in connection.execute(LEADING_COLUMNS)}
+    tables = {row.table_name: row for row in connection.execute(TABLE_STATS)}
+    statements = list(connection.execute(TOP_STATEMENTS)) if connection.execute(HAS_STATEMENTS).first() else None
+
+    missing = [key for key in foreign_keys() if key[:2] not in indexed and key[0] in tables]
+    print("foreign keys without an index:")
+    for table, column, referred in missing:
+        findings += 1
+        stats = tables[table]
+        print(f"  {table}.{column} -> {referred}: {stats.seq_scan} seq scans reading {stats.seq_tup_read} rows, "
+              f"{stats.idx_scan or 0} index scans, {stats.n_live_tup} live rows")
+        print(f"    CREATE INDEX CONCURRENTLY ix_{table}_{column} ON {table} ({column});")
+        if statements:
+            related = [statement for statement in statements if _mentions(statement.query, table, column)][:statements_per_key]
+            for statement in related:
+                query = " ".join(statement.query.split())
+                print(f"    {statement.calls} calls, {statement.mean_exec_time:.2f}ms mean: {query[:200]}")
+    if not missing:
+        print("  none")
+    if statements is None:
+        print("  (pg_stat_statements is not installed, so no statements are shown)")
+
+    print(f"\nindexes scanned at most {max_scans} times (excluding primary keys and unique constraints):")
+    unused = list(connection.execute(INDEX_USAGE, {"max_scans": max_scans}))
+    for row in unused:
+        findings += 1
+        print(f"  {row.table_name}.{row.index_name}: {row.idx_scan} scans, {row.size_bytes / 1024 / 1024:.1f} MiB")
+    if not unused:
+        print("  none")
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-scans", type=int, default=0, help="report indexes used at most this many times")
+    parser.add_argument("--statements", type=int, default=3, help="pg_stat_statements entries shown per foreign key")
+    parser.add_argument("--reset", action="store_true", help="reset the statistics and exit")
+    args = parser.parse_args()
+
+    load_models()
+    with engine.connect() as connection:
+        if args.reset:
+            connection.execute(text("SELECT pg_stat_reset()"))
+            if connection.execute(HAS_STATEMENTS).first():
+                connection.execute(text("SELECT pg_stat_statements_reset()"))
+            connection.commit()
+            print("statistics reset")
+            return
+        findings = advise(connection, args.max_scans, args.statements)
+    if findings:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from os import environ
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import pooling
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# seconds; 0 disables the slow request log
+SLOW_REQUEST_SECONDS = float(environ.get('SLOW_REQUEST_SECONDS', 1))
+SLOW_REQUEST_LOGGED_STATEMENTS = int(environ.get('SLOW_REQUEST_LOGGED_STATEMENTS', 5))
+SLOW_REQUEST_SQL_LENGTH = 1000
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: tuple, labels: tuple):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: tuple, value: float):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, counts[:], count, total) for labels, (counts, count, total) in self._series.items())
+        for label_values, counts, count, total in series:
+            labels = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(self.labels, label_values))
+            separator = "," if labels else ""
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{labels}{separator}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{labels}{separator}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+request_latency = Histogram("http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS, ("method", "route", "status"))
+request_statements = Histogram("db_statements_per_request", "SQL statements executed per request.", STATEMENT_BUCKETS, ("method", "route"))
+request_sql_time = Histogram("db_time_per_request_seconds", "Time spent executing SQL per request.", LATENCY_BUCKETS, ("method", "route"))
+request_pool_wait = Histogram("db_pool_wait_per_request_seconds", "Time spent waiting for pool connections per request.", LATENCY_BUCKETS, ("method", "route"))
+
+
+class RequestStats:
+    def __init__(self):
+        self.statements = 0
+        self.sql_time = 0.0
+        self.pool_wait = 0.0
+        # the slowest statements, kept as a min-heap of (duration, sequence, sql)
+        self.slowest = []
+        self._lock = threading.Lock()
+
+    def record_statement(self, duration: float, statement: str):
+        with self._lock:
+            self.statements += 1
+            self.sql_time += duration
+            entry = (duration, self.statements, statement)
+            if len(self.slowest) < SLOW_REQUEST_LOGGED_STATEMENTS:
+                heapq.heappush(self.slowest, entry)
+            elif self.slowest and duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def record_pool_wait(self, wait: float):
+        with self._lock:
+            self.pool_wait += wait
+
+
+# Set for the duration of a request. Threadpool workers, run_sync greenlets and
+# streaming iterators all run in a copy of the request's context, so they see
+# (and add to) the same RequestStats object.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record_statement(duration, statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _record_pool_wait(wait: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.record_pool_wait(wait)
+
+pooling.checkout_listeners.append(_record_pool_wait)
+
+
+class InstrumentationMiddleware:
+    # Plain ASGI middleware, so the timing also covers streamed response bodies
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            _current.reset(token)
+            route = scope.get("route")
+            # the route template keeps label cardinality bounded
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            request_latency.observe((method, route_path, str(status[0])), duration)
+            request_statements.observe((method, route_path), stats.statements)
+            request_sql_time.observe((method, route_path), stats.sql_time)
+            request_pool_wait.observe((method, route_path), stats.pool_wait)
+            if SLOW_REQUEST_SECONDS and duration >= SLOW_REQUEST_SECONDS:
+                _log_slow_request(method, scope["path"], route_path, status[0], duration, stats)
+
+
+def _log_slow_request(method: str, path: str, route_path: str, status: int, duration: float, stats: RequestStats):
+    statements = "".join(
+        f"\n  {statement_duration * 1000:.1f}ms {sql[:SLOW_REQUEST_SQL_LENGTH]}"
+        for statement_duration, _, sql in sorted(stats.slowest, reverse=True)
+    )
+    logger.warning(
+        "slow request %s %s (%s) status=%s %.1fms: %d statements, %.1fms SQL, %.1fms pool wait%s",
+        method, path, route_path, status, duration * 1000, stats.statements, stats.sql_time * 1000, stats.pool_wait * 1000, statements,
+    )
+
+
+def render(engines: dict) -> str:
+    lines = []
+    for histogram in (request_latency, request_statements, request_sql_time, request_pool_wait):
+        lines.extend(histogram.render())
+    gauges = [
+        ("db_pool_size", "Configured pool size.", "size"),
+        ("db_pool_checked_out", "Connections currently checked out.", "checked_out"),
+        ("db_pool_overflow", "Overflow connections currently open.", "overflow"),
+        ("db_pool_checkouts_total", "Successful connection checkouts.", "checkouts"),
+        ("db_pool_timeouts_total", "Checkouts that timed out.", "timeouts"),
+        ("db_pool_wait_seconds_total", "Total time spent waiting for connections.", "wait_seconds_total"),
+    ]
+    statuses = {name: pooling.pool_status(engine.pool) for name, engine in engines.items()}
+    for metric, description, key in gauges:
+        kind = "counter" if metric.endswith("_total") else "gauge"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, status in statuses.items():
+            if key in status:
+                lines.append(f'{metric}{{engine="{name}"}} {status[key]}')
+    return "\n".join(lines) + "\n"
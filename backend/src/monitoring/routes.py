@@ -0,0 +1,38 @@
+import os
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+import database
+import migrations
+from monitoring import metrics
+from pooling import pool_status
+
+health_router = APIRouter(prefix="/health", tags=['Health'])
+metrics_router = APIRouter(tags=['Monitoring'])
+
+# Liveness only says the process is serving; it never touches the database,
+# so a database outage does not get healthy workers restarted.
+@health_router.get('/live')
+async def get_liveness():
+    return {"status": "alive", "pid": os.getpid()}
+
+# Readiness gates traffic: the primary must answer and be at the head revision.
+@health_router.get('/ready')
+async def get_readiness():
+    problem = await run_in_threadpool(migrations.check, database.engine)
+    if problem:
+        return JSONResponse({"status": "unavailable", "detail": problem}, status_code=503)
+    return {"status": "ready"}
+
+@health_router.get('/pool')
+async def get_pool_status():
+    return {
+        "pid": os.getpid(),
+        "pools": {name: pool_status(engine.pool) for name, engine in database.engines.items()},
+    }
+
+# Prometheus text exposition; every worker process reports its own series
+@metrics_router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(database.engines), media_type="text/plain; version=0.0.4")
@@ -1,18 +1,28 @@
+from datetime import date, timedelta
+from decimal import Decimal
 from fastapi import Depends, HTTPException
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from order import models
 from database import get_db
 from order import validation
-from typing import List
+from typing import List, Optional
+import pagination
+import repository
+import streaming
+import timerange
 
 from order import schemas
+from product import models as product_models
+from product import controllers as product_controllers
 
-def get_orders(db: Session = Depends(get_db)) -> List[schemas.OrderResponse]:
-    db_orders = db.query(models.Order).all()
-    if not db_orders:
+def get_orders(params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.OrderResponse]:
+    page = pagination.paginate(db.query(models.Order), schemas.OrderResponse, params)
+    if not page.items and params.cursor is None:
         raise HTTPException(status_code=404, detail="Orders not found")
 
-    return [schemas.OrderResponse.model_validate(order) for order in db_orders]
+    return page
 
 def get_order_by_id(order_id: int, db: Session = Depends(get_db)) -> schemas.OrderResponse:
     order = db.query(models.Order).filter(models.Order.id == order_id).first()
@@ -32,27 +42,20 @@ def create_order(order: schemas.OrderUpdate, db: Session = Depends(get_db)) -> s
     return schemas.OrderResponse.model_validate(db_order)
 
 def update_order(order_id: int, order: schemas.OrderUpdate, db: Session = Depends(get_db)) -> schemas.OrderResponse:
-    if not validation.check_user_id_valid(order.user_id, db):
+    try:
+        updated = repository.update_by_id(db, models.Order, schemas.OrderResponse, order_id, order.model_dump(exclude_unset=True), detail="Order not found")
+    except IntegrityError:
+        # the only foreign key on orders is user_id
+        db.rollback()
         raise HTTPException(status_code=404, detail="User not found")
-    
-    db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
-    if not db_order:
-        raise HTTPException(status_code=404, detail="Order not found")
-
-    update_data = order.model_dump(exclude_unset=True)
-    db.query(models.Order).filter(models.Order.id == order_id).update(update_data)
-    
     db.commit()
-    db.refresh(db_order)
-    return schemas.OrderResponse.model_validate(db_order)
+    return updated
 
 def delete_order(order_id: int, db: Session = Depends(get_db)):
-    db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
-    if not db_order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    db.delete(db_order)
+    # order lines go with it through ON DELETE CASCADE
+    repository.delete_by_id(db, models.Order, order_id, detail="Order not found")
     db.commit()
-    return db_order
+    return {"message": "Order deleted successfully"}
 
 def get_order_by_id(order_id: int, db: Session = Depends(get_db)) -> schemas.OrderResponse:
     order = db.query(models.Order).filter(models.Order.id == order_id).first()
@@ -66,24 +69,43 @@ def get_orders_by_user_id(user_id: int, db: Session = Depends(get_db)) -> List[s
         raise HTTPException(status_code=404, detail="Order not found")
     return [schemas.OrderResponse.model_validate(order) for order in orders]
 
-def get_orders_by_date(order_date: str, db: Session = Depends(get_db)) -> List[schemas.OrderResponse]:
-    orders = db.query(models.Order).filter(models.Order.order_date >= order_date, models.Order.order_date <= order_date).all()
-    if orders is None:
-        raise HTTPException(status_code=404, detail="Order not found")
-    return [schemas.OrderResponse.model_validate(order) for order in orders]
+def _orders_between(start: timerange.DateOrDatetime, end: timerange.DateOrDatetime, user_id: Optional[int], params: pagination.PageParams, db: Session) -> pagination.Page[schemas.OrderResponse]:
+    # half-open [start, end): served by ix_orders_user_id_order_date when
+    # filtering by user, and by the BRIN index on order_date otherwise
+    query = db.query(models.Order).filter(*timerange.half_open(models.Order.order_date, start, end))
+    if user_id is not None:
+        query = query.filter(models.Order.user_id == user_id)
+    return pagination.paginate(query, schemas.OrderResponse, params, keys=[models.Order.order_date, models.Order.id])
+
+def get_user_orders(user_id: int, params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.OrderResponse]:
+    # newest first, read backwards along ix_orders_user_id_order_date
+    query = db.query(models.Order).filter(models.Order.user_id == user_id)
+    page = pagination.paginate(query, schemas.OrderResponse, params, keys=[models.Order.order_date, models.Order.id], descending=True)
+    if not page.items and params.cursor is None and not validation.check_user_id_valid(user_id, db):
+        raise HTTPException(status_code=404, detail="User not found")
+    return page
 
-def get_orders_by_date_range(from_date: str, to_date: str, db: Session = Depends(get_db)) -> List[schemas.OrderResponse]:
-    orders = db.query(models.Order).filter(models.Order.order_date >= from_date, models.Order.order_date <= to_date).all()
-    if orders is None:
-        raise HTTPException(status_code=404, detail="Order not found")
-    return [schemas.OrderResponse.model_validate(order) for order in orders]
+def get_orders_by_date(order_date: date, params: pagination.PageParams, user_id: Optional[int] = None, db: Session = Depends(get_db)) -> pagination.Page[schemas.OrderResponse]:
+    return _orders_between(order_date, order_date + timedelta(days=1), user_id, params, db)
+
+def get_orders_by_date_range(from_date: timerange.DateOrDatetime, to_date: timerange.DateOrDatetime, params: pagination.PageParams, user_id: Optional[int] = None, db: Session = Depends(get_db)) -> pagination.Page[schemas.OrderResponse]:
+    return _orders_between(from_date, to_date, user_id, params, db)
+
+EXPORT_COLUMNS = [models.Order.id, models.Order.user_id, models.Order.total_amount, models.Order.order_date, models.Order.updated_at]
+
+def export_orders(file_format: streaming.FileFormat, start: Optional[timerange.DateOrDatetime] = None, end: Optional[timerange.DateOrDatetime] = None, user_id: Optional[int] = None):
+    # validated before the first chunk so a bad range is still a 400
+    criteria = timerange.half_open(models.Order.order_date, start, end)
+    if user_id is not None:
+        criteria.append(models.Order.user_id == user_id)
+    return streaming.export_rows(select(*EXPORT_COLUMNS).where(*criteria).order_by(models.Order.id), file_format)
 
 # order detail 
-def get_all_order_details(db: Session = Depends(get_db)) -> List[schemas.OrderDetailResponse]:
-    db_details = db.query(models.OrderDetail).all()
-    if not db_details:
+def get_all_order_details(params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.OrderDetailResponse]:
+    page = pagination.paginate(db.query(models.OrderDetail), schemas.OrderDetailResponse, params)
+    if not page.items and params.cursor is None:
         raise HTTPException(status_code=404, detail="Order Details not found")
-    return [schemas.OrderDetailResponse.model_validate(detail) for detail in db_details]
+    return page
 
 def get_order_details(order_id: int, db: Session = Depends(get_db)) -> List[schemas.OrderDetailResponse]:
     order_details = db.query(models.OrderDetail).filter(models.OrderDetail.order_id == order_id).all()
@@ -103,25 +125,64 @@ def create_order_detail(order_detail: schemas.OrderDetailCreate, db: Session = D
     return schemas.OrderDetailResponse.model_validate(db_order_detail)
 
 def update_order_detail(order_detail_id: int, order_detail: schemas.OrderDetailUpdate, db: Session = Depends(get_db)) -> schemas.OrderDetailResponse:
-    db_order_detail = db.query(models.OrderDetail).filter(models.OrderDetail.id == order_detail_id).first()
-    if not db_order_detail:
-        raise HTTPException(status_code=404, detail="Order Detail not found")
-    # db_order_detail.product_id = order_detail.product_id
-    # db_order_detail.quantity = order_detail.quantity
-    # db_order_detail.unit_price = order_detail.unit_price
-    # db_order_detail.updated_at = order_detail.updated_at
-    update_data = order_detail.model_dump(exclude_unset=True)
-    
-    db.query(models.OrderDetail).filter(models.OrderDetail.id == order_detail_id).update(update_data)
-    
+    updated = repository.update_by_id(db, models.OrderDetail, schemas.OrderDetailResponse, order_detail_id, order_detail.model_dump(exclude_unset=True), detail="Order Detail not found")
     db.commit()
-    db.refresh(db_order_detail)
-    return db_order_detail
+    return updated
 
 def delete_order_detail(order_detail_id: int, db: Session = Depends(get_db)):
-    db_order_detail = db.query(models.OrderDetail).filter(models.OrderDetail.id == order_detail_id).first()
-    if not db_order_detail:
-        raise HTTPException(status_code=404, detail="Order Detail not found")
-    db.delete(db_order_detail)
+    repository.delete_by_id(db, models.OrderDetail, order_detail_id, detail="Order Detail not found")
+    db.commit()
+    return {"message": "Order Detail deleted successfully"}
+
+# checkout 
+def checkout(order: schemas.CheckoutCreate, db: Session = Depends(get_db)) -> schemas.CheckoutResponse:
+    if not order.items:
+        raise HTTPException(status_code=400, detail="Order has no items")
+    quantities = {}
+    for item in order.items:
+        if item.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Invalid quantity")
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    
+    if not validation.check_user_id_valid(order.user_id, db):
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Lock every product of the order, always in id order so concurrent
+    # checkouts sharing SKUs queue up instead of deadlocking.
+    Product = product_models.Product
+    products = db.execute(
+        select(Product.id, Product.price, Product.discount_price, Product.quantity)
+        .where(Product.id.in_(quantities))
+        .order_by(Product.id)
+        .with_for_update()
+    ).all()
+    if len(products) != len(quantities):
+        missing = sorted(set(quantities) - {product.id for product in products})
+        raise HTTPException(status_code=404, detail=f"Product {missing[0]} not found")
+    
+    lines = []
+    for product in products:
+        quantity = quantities[product.id]
+        if (product.quantity or 0) < quantity:
+            raise HTTPException(status_code=400, detail=f"Insufficient stock for product {product.id}")
+        price = product.discount_price if product.discount_price and product.discount_price > 0 else product.price
+        lines.append({"product_id": product.id, "quantity": quantity, "unit_price": Decimal(str(price))})
+    
+    db_order = models.Order(user_id=order.user_id, total_amount=sum(line["unit_price"] * line["quantity"] for line in lines))
+    db.add(db_order)
+    db.flush()
+    
+    db_details = db.scalars(insert(models.OrderDetail).returning(models.OrderDetail), [dict(line, order_id=db_order.id) for line in lines]).all()
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities))
+        .values(quantity=Product.quantity - case(quantities, value=Product.id))
+    )
+    
+    response = schemas.CheckoutResponse(
+        **schemas.OrderResponse.model_validate(db_order).model_dump(),
+        order_details=[schemas.OrderDetailResponse.model_validate(detail) for detail in db_details],
+    )
     db.commit()
-    return db_order_detail
\ No newline at end of file
+    product_controllers.invalidate_products(quantities)
+    return response
@@ -1,25 +1,31 @@
 from database import Base
-from sqlalchemy import Integer, Column,TIMESTAMP, text, ForeignKey, DECIMAL
+from sqlalchemy import Integer, Column,TIMESTAMP, text, ForeignKey, DECIMAL, Index
 from sqlalchemy.orm import relationship
 
 class Order(Base):
     __tablename__ = "orders"
     
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     total_amount = Column(DECIMAL, nullable=False)
     order_date = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     
     user = relationship("User", back_populates="orders")
-    order_details = relationship("OrderDetail", back_populates="order", cascade="all, delete")
+    order_details = relationship("OrderDetail", back_populates="order", cascade="all, delete", passive_deletes=True)
+    
+    __table_args__ = (
+        Index('ix_orders_user_id_order_date', 'user_id', 'order_date'),
+        # orders are appended in order_date order, so a BRIN index stays tiny
+        Index('ix_orders_order_date_brin', 'order_date', postgresql_using='brin'),
+    )
     
 class OrderDetail(Base):
     __tablename__ = 'order_detail'
     
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete='CASCADE'), index=True, nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), index=True, nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(DECIMAL, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
@@ -1,65 +1,79 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi.responses import StreamingResponse
+from database import AnySession, get_read_session, get_session, run
+from responses import ValidatedRoute
 from order import models
 from order import schemas
 
 from order import controllers
-from typing import List
+from datetime import date
+from typing import List, Optional
+import pagination
+import streaming
+import timerange
 
-order_router = APIRouter(prefix="/order", tags=['Order'])
-order_detail_router = APIRouter(prefix="/order_detail", tags=['Order Detail'])
+order_router = APIRouter(prefix="/order", tags=['Order'], route_class=ValidatedRoute)
+order_detail_router = APIRouter(prefix="/order_detail", tags=['Order Detail'], route_class=ValidatedRoute)
 
-@order_router.get("", response_model=List[schemas.OrderResponse])
-def get_orders(db: Session = Depends(get_db)):
-    return db.query(models.Order).all()
+@order_router.get("", response_model=pagination.Page[schemas.OrderResponse])
+async def get_orders(params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_orders, params, db=db)
+
+@order_router.get("/date", response_model=pagination.Page[schemas.OrderResponse])
+async def get_orders_by_date(order_date: date, user_id: Optional[int] = None, params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_orders_by_date, order_date, params, user_id, db=db)
+
+@order_router.get("/date_range", response_model=pagination.Page[schemas.OrderResponse])
+async def get_orders_by_date_range(start_date: timerange.DateOrDatetime, end_date: timerange.DateOrDatetime, user_id: Optional[int] = None, params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_orders_by_date_range, start_date, end_date, params, user_id, db=db)
+
+@order_router.get("/export")
+async def export_orders(format: streaming.FileFormat = streaming.FileFormat.CSV, start_date: Optional[timerange.DateOrDatetime] = None, end_date: Optional[timerange.DateOrDatetime] = None, user_id: Optional[int] = None):
+    rows = controllers.export_orders(format, start_date, end_date, user_id)
+    return StreamingResponse(rows, media_type=streaming.MEDIA_TYPES[format])
 
 @order_router.get("/{order_id}", response_model=schemas.OrderResponse)
-def get_order_by_id(order_id: int, db: Session = Depends(get_db)):
-    return controllers.get_order_by_id(order_id, db)
+async def get_order_by_id(order_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_order_by_id, order_id, db=db)
 
 @order_router.get("/user/{user_id}", response_model=List[schemas.OrderResponse])
-def get_orders_by_user_id(user_id: int, db: Session = Depends(get_db)):
-    return controllers.get_orders_by_user_id(user_id, db)
+async def get_orders_by_user_id(user_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_orders_by_user_id, user_id, db=db)
 
 @order_router.post("", status_code=201, response_model=schemas.OrderResponse)
-def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
-    return controllers.create_order(order, db)
+async def create_order(order: schemas.OrderCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.create_order, order, db=db)
+
+@order_router.post("/checkout", status_code=201, response_model=schemas.CheckoutResponse)
+async def checkout(order: schemas.CheckoutCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.checkout, order, db=db)
 
 @order_router.put("/{order_id}", response_model=schemas.OrderResponse)
-def update_order(order_id: int, order: schemas.OrderUpdate, db: Session = Depends(get_db)):
-    return controllers.update_order(order_id, order, db)
+async def update_order(order_id: int, order: schemas.OrderUpdate, db: AnySession = Depends(get_session)):
+    return await run(controllers.update_order, order_id, order, db=db)
 
 @order_router.delete("/{order_id}")
-def delete_order(order_id: int, db: Session = Depends(get_db)):
-    return controllers.delete_order(order_id, db)
-
-@order_router.get("/date", response_model=List[schemas.OrderResponse])
-def get_orders_by_date(order_date: str, db: Session = Depends(get_db)):
-    return controllers.get_orders_by_date(order_date, db)
-
-@order_router.get("/date_range", response_model=List[schemas.OrderResponse])
-def get_orders_by_date_range(start_date: str, end_date: str, db: Session = Depends(get_db)):
-    return controllers.get_orders_by_date_range(start_date, end_date, db)
+async def delete_order(order_id: int, db: AnySession = Depends(get_session)):
+    return await run(controllers.delete_order, order_id, db=db)
 
 
 # order detail 
-@order_detail_router.get("", response_model=List[schemas.OrderDetailResponse])
-def get_all_order_details(db: Session = Depends(get_db)):
-    return controllers.get_all_order_details(db)
+@order_detail_router.get("", response_model=pagination.Page[schemas.OrderDetailResponse])
+async def get_all_order_details(params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_all_order_details, params, db=db)
 
 @order_detail_router.get("/{order_id}", response_model=List[schemas.OrderDetailResponse])
-def get_order_detail(order_id: int, db: Session = Depends(get_db)):
-    return controllers.get_order_details(order_id, db)
+async def get_order_detail(order_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_order_details, order_id, db=db)
 
 @order_detail_router.post("", status_code=201, response_model=schemas.OrderDetailResponse)
-def create_order_detail(order_detail: schemas.OrderDetailCreate, db: Session = Depends(get_db)):
-    return controllers.create_order_detail(order_detail, db)
+async def create_order_detail(order_detail: schemas.OrderDetailCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.create_order_detail, order_detail, db=db)
 
 @order_detail_router.put("/{order_detail_id}", response_model=schemas.OrderDetailResponse)
-def update_order_detail(order_detail: schemas.OrderDetailUpdate, db: Session = Depends(get_db)):
-    return controllers.update_order_detail(order_detail, db)
+async def update_order_detail(order_detail_id: int, order_detail: schemas.OrderDetailUpdate, db: AnySession = Depends(get_session)):
+    return await run(controllers.update_order_detail, order_detail_id, order_detail, db=db)
 
 @order_detail_router.delete("/{order_detail_id}")
-def delete_order_detail(order_detail_id: int, db: Session = Depends(get_db)):
-    return controllers.delete_order_detail(order_detail_id, db)
\ No newline at end of file
+async def delete_order_detail(order_detail_id: int, db: AnySession = Depends(get_session)):
+    return await run(controllers.delete_order_detail, order_detail_id, db=db)
\ No newline at end of file
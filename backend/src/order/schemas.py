@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 # Order schema 
 class OrderBase(BaseModel):
@@ -56,3 +56,14 @@ class OrderDetailResponse(BaseModel):
         "from_attributes": True
     }
     
+# Checkout schema
+class CheckoutItem(BaseModel):
+    product_id: int
+    quantity: int
+    
+class CheckoutCreate(BaseModel):
+    user_id: int
+    items: List[CheckoutItem]
+    
+class CheckoutResponse(OrderResponse):
+    order_details: List[OrderDetailResponse]
@@ -0,0 +1,94 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+T = TypeVar('T')
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class PageParams(BaseModel):
+    cursor: Optional[str] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+
+# Dependency
+def page_params(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, default=_json_default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, keys: list) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    return [_coerce(value, key) for value, key in zip(values, keys)]
+
+
+def _coerce(value, key):
+    try:
+        python_type = key.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+
+def paginate(query, schema, params: PageParams, keys: Optional[list] = None, descending: bool = False) -> Page:
+    # Keyset pagination: rows are ordered by `keys` and the cursor carries the
+    # key values of the last row, so every page is an index range scan.
+    if keys is None:
+        keys = [query.column_descriptions[0]['entity'].id]
+
+    query = query.add_columns(*keys)
+    if params.cursor:
+        values = decode_cursor(params.cursor, keys)
+        if len(keys) == 1:
+            left, right = keys[0], values[0]
+        else:
+            left, right = tuple_(*keys), tuple_(*values)
+            # redundant bound on the leading key for indexes that cannot
+            # match a row comparison (BRIN, single-column btrees)
+            query = query.filter(keys[0] <= values[0] if descending else keys[0] >= values[0])
+        query = query.filter(left < right if descending else left > right)
+
+    order_by = [key.desc() for key in keys] if descending else keys
+    rows = query.order_by(*order_by).limit(params.limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(list(rows[-1][1:]))
+
+    return Page[schema](items=[schema.model_validate(row[0]) for row in rows], next_cursor=next_cursor)
@@ -1,4 +1,8 @@
-from sqlalchemy import func
+import csv
+import hashlib
+import io
+from sqlalchemy import Float, Numeric, cast, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from database import get_db
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -7,22 +11,54 @@ from product import schemas
 from product import validation
 from unidecode import unidecode
 from typing import List
+from pydantic import TypeAdapter, ValidationError
+from cache import catalog
+import loaders
+import pagination
+import repository
+import streaming
+
+# catalog cache keys
+PRODUCT_GROUPS_KEY = "product_groups"
+PRODUCT_CATEGORIES_KEY = "product_categories"
+CATALOG_TREE_KEY = "catalog_tree"
+
+ProductGroupList = TypeAdapter(List[schemas.ProductGroupResponse])
+ProductCategoryList = TypeAdapter(List[schemas.ProductCategoryResponse])
+CatalogTree = TypeAdapter(List[schemas.CatalogGroup])
+
+def _product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def invalidate_products(product_ids):
+    catalog.invalidate(*(_product_key(product_id) for product_id in product_ids))
+
+def _product_keys(db: Session, *criteria) -> List[str]:
+    # products embed their category and group, so renaming either fans out
+    return [_product_key(product_id) for (product_id,) in db.query(models.Product.id).filter(*criteria)]
 
 
 # Product controller 
-def get_products(db: Session = Depends(get_db)) -> List[schemas.ProductResponse]:
-    db_products = db.query(models.Product).all()
-    if not db_products:
+def get_products(params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.ProductResponse]:
+    query = loaders.query(db, models.Product, schemas.ProductResponse)
+    page = pagination.paginate(query, schemas.ProductResponse, params)
+    if not page.items and params.cursor is None:
         raise HTTPException(status_code=404, detail="Products not found")
     
-    return [schemas.ProductResponse.model_validate(product) for product in db_products]
+    return page
 
 
 def get_product_by_id(product_id: int, db: Session = Depends(get_db)) -> schemas.ProductResponse:
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    cached = catalog.get(_product_key(product_id))
+    if cached is not None:
+        return schemas.ProductResponse.model_validate_json(cached)
+    
+    product = loaders.query(db, models.Product, schemas.ProductResponse).filter(models.Product.id == product_id).first()
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return schemas.ProductResponse.model_validate(product)
+    response = schemas.ProductResponse.model_validate(product)
+    catalog.add(_product_key(product_id), response.model_dump_json().encode())
+    return response
 
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)) -> schemas.ProductResponse:
     if not validation.check_product_group_valid(product.group_id, db):
@@ -34,37 +70,37 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     db_product = models.Product(**product.model_dump())
     db.add(db_product)
     db.commit()
+    catalog.invalidate(CATALOG_TREE_KEY)
     db.refresh(db_product)
     return schemas.ProductResponse.model_validate(db_product)
 
 def update_product(product_id: int, product: schemas.ProductUpdate, db: Session = Depends(get_db)) -> schemas.ProductResponse:
-    db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
     update_data = product.model_dump(exclude_unset=True)
-    
-    db.query(models.Product).filter(models.Product.id == product_id).update(update_data)
-    
+    updated = repository.update_by_id(db, models.Product, schemas.ProductResponse, product_id, update_data, detail="Product not found")
     db.commit()
-    db.refresh(db_product)
-    return db_product
+    catalog.invalidate(_product_key(product_id), CATALOG_TREE_KEY)
+    return updated
 
 def delete_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    db.delete(db_product)
+    # order lines go with it through ON DELETE CASCADE
+    repository.delete_by_id(db, models.Product, product_id, detail="Product not found")
     db.commit()
+    catalog.invalidate(_product_key(product_id), CATALOG_TREE_KEY)
     return {"message": "Product deleted successfully"}
 
 # product group controller 
 def get_product_groups(db: Session = Depends(get_db)) -> List[schemas.ProductGroupResponse]:
+    cached = catalog.get(PRODUCT_GROUPS_KEY)
+    if cached is not None:
+        return ProductGroupList.validate_json(cached)
+    
     db_groups = db.query(models.ProductGroup).all()
     if not db_groups:
         raise HTTPException(status_code=404, detail="Product groups not found")
     
-    return [schemas.ProductGroupResponse.model_validate(group) for group in db_groups]
+    groups = [schemas.ProductGroupResponse.model_validate(group) for group in db_groups]
+    catalog.add(PRODUCT_GROUPS_KEY, ProductGroupList.dump_json(groups))
+    return groups
 
 def get_product_group_by_id(group_id: int, db: Session = Depends(get_db)) -> schemas.ProductGroupResponse:
     group = db.query(models.ProductGroup).filter(models.ProductGroup.id == group_id).first()
@@ -76,41 +112,41 @@ def create_product_group(group: schemas.ProductGroupCreate, db: Session = Depend
     db_group = models.ProductGroup(**group.model_dump())
     db.add(db_group)
     db.commit()
+    catalog.invalidate(PRODUCT_GROUPS_KEY, CATALOG_TREE_KEY)
     db.refresh(db_group)
-    return db_group
+    return schemas.ProductGroupResponse.model_validate(db_group)
 
 def update_product_group(group_id: int, group: schemas.ProductGroupUpdate, db: Session = Depends(get_db)) -> schemas.ProductGroupResponse:
-    db_group = db.query(models.ProductGroup).filter(models.ProductGroup.id == group_id).first()
-    if not db_group:
-        raise HTTPException(status_code=404, detail="Product group not found")
-    
-    update_data = group.model_dump(exclude_unset=True)
-    
-    db.query(models.ProductGroup).filter(models.ProductGroup.id == group_id).update(update_data)
-    
+    updated = repository.update_by_id(db, models.ProductGroup, schemas.ProductGroupResponse, group_id, group.model_dump(exclude_unset=True), detail="Product group not found")
+    stale_keys = _product_keys(db, models.Product.category_id.in_(select(models.ProductCategory.id).where(models.ProductCategory.group_id == group_id)))
     db.commit()
-    db.refresh(db_group)
-    
-    return schemas.ProductGroupResponse.model_validate(db_group)
+    catalog.invalidate(PRODUCT_GROUPS_KEY, PRODUCT_CATEGORIES_KEY, CATALOG_TREE_KEY, *stale_keys)
+    return updated
 
 def delete_product_group(group_id: int, db: Session = Depends(get_db)):
-    db_group = db.query(models.ProductGroup).filter(models.ProductGroup.id == group_id).first()
-    if not db_group:
-        raise HTTPException(status_code=404, detail="Product group not found")
-    db.delete(db_group)
+    # categories, products and their order lines go with it through ON DELETE CASCADE
+    stale_keys = _product_keys(db, or_(models.Product.group_id == group_id, models.Product.category_id.in_(select(models.ProductCategory.id).where(models.ProductCategory.group_id == group_id))))
+    repository.delete_by_id(db, models.ProductGroup, group_id, detail="Product group not found")
     db.commit()
+    catalog.invalidate(PRODUCT_GROUPS_KEY, PRODUCT_CATEGORIES_KEY, CATALOG_TREE_KEY, *stale_keys)
     return {"message": "Product group deleted successfully"}
 
 # product category controller 
 def get_product_categories(db: Session = Depends(get_db)) -> List[schemas.ProductCategoryResponse]:
-    db_categories = db.query(models.ProductCategory).all()
+    cached = catalog.get(PRODUCT_CATEGORIES_KEY)
+    if cached is not None:
+        return ProductCategoryList.validate_json(cached)
+
+    db_categories = loaders.query(db, models.ProductCategory, schemas.ProductCategoryResponse).all()
     if not db_categories:
         raise HTTPException(status_code=404, detail="Product categories not found")
 
-    return [schemas.ProductCategoryResponse.model_validate(category) for category in db_categories]
+    categories = [schemas.ProductCategoryResponse.model_validate(category) for category in db_categories]
+    catalog.add(PRODUCT_CATEGORIES_KEY, ProductCategoryList.dump_json(categories))
+    return categories
 
 def get_product_category_by_id(category_id: int, db: Session = Depends(get_db)) -> schemas.ProductCategoryResponse:
-    category = db.query(models.ProductCategory).filter(models.ProductCategory.id == category_id).first()
+    category = loaders.query(db, models.ProductCategory, schemas.ProductCategoryResponse).filter(models.ProductCategory.id == category_id).first()
     if category is None:
         raise HTTPException(status_code=404, detail="Product category not found")
     return schemas.ProductCategoryResponse.model_validate(category)
@@ -123,44 +159,247 @@ def create_product_category(category: schemas.ProductCategoryCreate, db: Session
 
     db.add(db_category)
     db.commit()
+    catalog.invalidate(PRODUCT_CATEGORIES_KEY, CATALOG_TREE_KEY)
     db.refresh(db_category)
     return schemas.ProductCategoryResponse.model_validate(db_category)
 
-def update_product_category(category_id: int, category: schemas.ProductCategoryUpdate, db: Session = Depends(get_db)) -> schemas.ProductCategoryResponse:    
-    db_category = db.query(models.ProductCategory).filter(models.ProductCategory.id == category_id).first()
-    if not db_category:
-        raise HTTPException(status_code=404, detail="Product category not found")
-    
-    update_data = category.model_dump(exclude_unset=True)
-    db.query(models.ProductCategory).filter(models.ProductCategory.id == category_id).update(update_data)
-    
+def update_product_category(category_id: int, category: schemas.ProductCategoryUpdate, db: Session = Depends(get_db)) -> schemas.ProductCategoryResponse:
+    updated = repository.update_by_id(db, models.ProductCategory, schemas.ProductCategoryResponse, category_id, category.model_dump(exclude_unset=True), detail="Product category not found")
+    stale_keys = _product_keys(db, models.Product.category_id == category_id)
     db.commit()
-    db.refresh(db_category)
-    return schemas.ProductCategoryResponse.model_validate(db_category)
+    catalog.invalidate(PRODUCT_CATEGORIES_KEY, CATALOG_TREE_KEY, *stale_keys)
+    return updated
 
 def delete_product_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = db.query(models.ProductCategory).filter(models.ProductCategory.id == category_id).first()
-    if not db_category:
-        raise HTTPException(status_code=404, detail="Product category not found")
-    db.delete(db_category)
+    # products and their order lines go with it through ON DELETE CASCADE
+    stale_keys = _product_keys(db, models.Product.category_id == category_id)
+    repository.delete_by_id(db, models.ProductCategory, category_id, detail="Product category not found")
     db.commit()
+    catalog.invalidate(PRODUCT_CATEGORIES_KEY, CATALOG_TREE_KEY, *stale_keys)
     return {"message": "Product category deleted successfully"}
 
+# catalog tree controller
+CATALOG_TREE = (
+    select(
+        models.ProductGroup.id.label("group_id"),
+        models.ProductGroup.name.label("group_name"),
+        models.ProductCategory.id.label("category_id"),
+        models.ProductCategory.name.label("category_name"),
+        func.count(models.Product.id).label("product_count"),
+    )
+    .outerjoin(models.ProductCategory, models.ProductCategory.group_id == models.ProductGroup.id)
+    .outerjoin(models.Product, models.Product.category_id == models.ProductCategory.id)
+    .group_by(models.ProductGroup.id, models.ProductGroup.name, models.ProductCategory.id, models.ProductCategory.name)
+    .order_by(models.ProductGroup.id, models.ProductCategory.id)
+)
+
+def get_catalog_tree(db: Session = Depends(get_db)) -> bytes:
+    # Serialized once and kept in the catalog cache until a group, category or
+    # product write invalidates it; routes hash these bytes for the ETag
+    cached = catalog.get(CATALOG_TREE_KEY)
+    if cached is not None:
+        return cached
+
+    groups = {}
+    for row in db.execute(CATALOG_TREE):
+        group = groups.get(row.group_id)
+        if group is None:
+            group = groups[row.group_id] = schemas.CatalogGroup(id=row.group_id, name=row.group_name, product_count=0, categories=[])
+        if row.category_id is not None:
+            group.categories.append(schemas.CatalogCategory(id=row.category_id, name=row.category_name, product_count=row.product_count))
+            group.product_count += row.product_count
+
+    tree = CatalogTree.dump_json(list(groups.values()))
+    catalog.add(CATALOG_TREE_KEY, tree)
+    return tree
+
+# bulk import/export controller 
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_IMPORT_ERRORS = 1000
+IMPORT_COLUMNS = ["line", "id", "name", "image", "price", "discount_price", "quantity", "description", "supplier", "group_id", "category_id"]
+EXPORT_COLUMNS = [models.Product.id, models.Product.name, models.Product.image, models.Product.price, models.Product.discount_price, models.Product.quantity, models.Product.description, models.Product.supplier, models.Product.group_id, models.Product.category_id, models.Product.created_at, models.Product.updated_at]
+
+def _copy_into_staging(cursor, rows: list):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([r"\N" if value is None else value for value in row] for row in rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY product_import ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+def import_products(source, file_format: streaming.FileFormat, db: Session = Depends(get_db)) -> schemas.ProductImportResult:
+    # Rows are validated one by one, COPYed into a temp staging table in
+    # batches, checked against groups/categories set-wise and then applied
+    # with one UPDATE (rows carrying an id) and one INSERT (new rows).
+    errors = []
+    db.execute(text(
+        "CREATE TEMP TABLE product_import (line integer, id integer, name varchar, image varchar, "
+        "price double precision, discount_price double precision, quantity integer, description varchar, "
+        "supplier varchar, group_id integer, category_id integer) ON COMMIT DROP"
+    ))
+    cursor = db.connection().connection.cursor()
+    batch = []
+    for line, record, error in streaming.decode_records(source, file_format):
+        if record is not None:
+            try:
+                row = schemas.ProductImport.model_validate(record)
+            except ValidationError as validation_error:
+                error = "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in validation_error.errors())
+        if error is not None:
+            errors.append(schemas.ProductImportError(line=line, error=error))
+            continue
+        batch.append([line] + [getattr(row, column) for column in IMPORT_COLUMNS[1:]])
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _copy_into_staging(cursor, batch)
+            batch = []
+    if batch:
+        _copy_into_staging(cursor, batch)
+    cursor.close()
+
+    rejected = db.execute(text(
+        "DELETE FROM product_import s "
+        "WHERE NOT EXISTS (SELECT 1 FROM product_group g WHERE g.id = s.group_id) "
+        "OR NOT EXISTS (SELECT 1 FROM product_category c WHERE c.id = s.category_id) "
+        "OR (s.id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM products p WHERE p.id = s.id)) "
+        "RETURNING s.line, "
+        "EXISTS (SELECT 1 FROM product_group g WHERE g.id = s.group_id), "
+        "EXISTS (SELECT 1 FROM product_category c WHERE c.id = s.category_id)"
+    )).all()
+    for line, group_exists, category_exists in rejected:
+        if not group_exists:
+            error = "Product group not found"
+        elif not category_exists:
+            error = "Product category not found"
+        else:
+            error = "Product not found"
+        errors.append(schemas.ProductImportError(line=line, error=error))
+
+    updated_ids = db.execute(text(
+        "UPDATE products p SET name = s.name, image = s.image, price = s.price, discount_price = s.discount_price, "
+        "quantity = s.quantity, description = s.description, supplier = s.supplier, group_id = s.group_id, "
+        "category_id = s.category_id, updated_at = now() "
+        "FROM product_import s WHERE s.id IS NOT NULL AND p.id = s.id RETURNING p.id"
+    )).scalars().all()
+    created = db.execute(text(
+        "INSERT INTO products (name, image, price, discount_price, quantity, description, supplier, group_id, category_id) "
+        "SELECT name, image, price, discount_price, quantity, description, supplier, group_id, category_id "
+        "FROM product_import WHERE id IS NULL ORDER BY line"
+    )).rowcount
+    db.commit()
+    invalidate_products(updated_ids)
+    catalog.invalidate(CATALOG_TREE_KEY)
+
+    errors.sort(key=lambda item: item.line)
+    return schemas.ProductImportResult(created=created, updated=len(updated_ids), error_count=len(errors), errors=errors[:MAX_REPORTED_IMPORT_ERRORS])
+
+def export_products(file_format: streaming.FileFormat):
+    return streaming.export_rows(select(*EXPORT_COLUMNS).order_by(models.Product.id), file_format)
+
+# batch inventory controller 
+# Items arrive as five parallel arrays, so the statement has the same five
+# parameters however large the batch. Rows are locked in id order, like
+# checkout does, so concurrent batches cannot deadlock each other.
+INVENTORY_UPDATE = text(
+    "WITH v AS ("
+    "SELECT * FROM unnest(CAST(:product_ids AS integer[]), CAST(:quantities AS integer[]), CAST(:quantity_deltas AS integer[]), "
+    "CAST(:prices AS double precision[]), CAST(:discount_prices AS double precision[])) WITH ORDINALITY "
+    "AS v(product_id, quantity, quantity_delta, price, discount_price, ordinal)), "
+    "locked AS (SELECT id FROM products WHERE id IN (SELECT product_id FROM v) ORDER BY id FOR UPDATE), "
+    "updated AS ("
+    "UPDATE products p SET "
+    "quantity = COALESCE(v.quantity, COALESCE(p.quantity, 0) + COALESCE(v.quantity_delta, 0)), "
+    "price = COALESCE(v.price, p.price), "
+    "discount_price = COALESCE(v.discount_price, p.discount_price), "
+    "updated_at = now() "
+    "FROM v JOIN locked l ON l.id = v.product_id "
+    "WHERE p.id = v.product_id AND COALESCE(v.quantity, COALESCE(p.quantity, 0) + COALESCE(v.quantity_delta, 0)) >= 0 "
+    "RETURNING p.id, p.quantity, p.price, p.discount_price) "
+    "SELECT v.product_id, u.id IS NOT NULL AS updated, l.id IS NOT NULL AS found, u.quantity, u.price, u.discount_price "
+    "FROM v LEFT JOIN updated u ON u.id = v.product_id LEFT JOIN locked l ON l.id = v.product_id "
+    "ORDER BY v.ordinal"
+)
+
+def _inventory_result(rows) -> schemas.InventoryUpdateResult:
+    items = []
+    for row in rows:
+        if row.updated:
+            items.append(schemas.InventoryItemResult(product_id=row.product_id, status=schemas.InventoryStatus.UPDATED, quantity=row.quantity, price=row.price, discount_price=row.discount_price))
+        elif not row.found:
+            items.append(schemas.InventoryItemResult(product_id=row.product_id, status=schemas.InventoryStatus.NOT_FOUND, detail="Product not found"))
+        else:
+            items.append(schemas.InventoryItemResult(product_id=row.product_id, status=schemas.InventoryStatus.REJECTED, detail="Quantity would drop below zero"))
+    counts = {status: 0 for status in schemas.InventoryStatus}
+    for item in items:
+        counts[item.status] += 1
+    return schemas.InventoryUpdateResult(
+        updated=counts[schemas.InventoryStatus.UPDATED],
+        not_found=counts[schemas.InventoryStatus.NOT_FOUND],
+        rejected=counts[schemas.InventoryStatus.REJECTED],
+        items=items,
+    )
+
+def update_inventory(inventory: schemas.InventoryUpdate, db: Session = Depends(get_db), idempotency_key: str = None) -> schemas.InventoryUpdateResult:
+    items = inventory.items
+    if len({item.product_id for item in items}) != len(items):
+        raise HTTPException(status_code=400, detail="Each product_id may appear only once per batch")
+
+    if idempotency_key:
+        # Claiming the key first makes a concurrent retry wait on our insert
+        # and then replay our stored result instead of applying deltas twice.
+        request_hash = hashlib.sha256(inventory.model_dump_json().encode()).hexdigest()
+        claimed = db.execute(
+            pg_insert(models.InventoryUpdate)
+            .values(idempotency_key=idempotency_key, request_hash=request_hash)
+            .on_conflict_do_nothing()
+            .returning(models.InventoryUpdate.idempotency_key)
+        ).first()
+        if claimed is None:
+            previous = db.get(models.InventoryUpdate, idempotency_key)
+            db.rollback()
+            if previous.request_hash != request_hash:
+                raise HTTPException(status_code=409, detail="Idempotency key was already used for a different request")
+            return schemas.InventoryUpdateResult.model_validate(previous.response)
+
+    rows = db.execute(INVENTORY_UPDATE, {
+        "product_ids": [item.product_id for item in items],
+        "quantities": [item.quantity for item in items],
+        "quantity_deltas": [item.quantity_delta for item in items],
+        "prices": [item.price for item in items],
+        "discount_prices": [item.discount_price for item in items],
+    }).all()
+    result = _inventory_result(rows)
+
+    if idempotency_key:
+        db.execute(update(models.InventoryUpdate).where(models.InventoryUpdate.idempotency_key == idempotency_key).values(response=result.model_dump(mode='json')))
+    db.commit()
+    invalidate_products(item.product_id for item in result.items if item.status == schemas.InventoryStatus.UPDATED)
+    return result
+
 # search controller 
-def search_products(form: schemas.ProductSearch, db: Session = Depends(get_db)) -> schemas.ProductResponse:
-    query = db.query(models.Product).join(models.ProductCategory).join(models.ProductGroup)
-    if form.group_name:
-        form.group_name = form.group_name.strip()
-        query = query.filter(func.lower(func.unaccent(models.ProductGroup.name)).like(f"%{unidecode(form.group_name.lower())}%"))
-    if form.category_name:
-        form.category_name = form.category_name.strip()
-        query = query.filter(func.lower(func.unaccent(models.ProductCategory.name)).like(f"%{unidecode(form.category_name.lower())}%"))
-    if form.product_name:
-        form.product_name = form.product_name.strip()
-        query = query.filter(func.lower(func.unaccent(models.Product.name)).like(f"%{unidecode(form.product_name.lower())}%"))
-    if form.supplier:
-        form.supplier = form.supplier.strip()
-        query = query.filter(func.lower(func.unaccent(models.Product.supplier)).like(f"%{unidecode(form.supplier.lower())}%"))
+def _normalize_term(term: str) -> str:
+    return unidecode(term.strip().lower())
+
+def _searchable(column):
+    # must match the expression of the trigram indexes in the search migration
+    return func.lower(func.f_unaccent(column))
+
+def _contains(column, term: str):
+    pattern = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return _searchable(column).like(f"%{pattern}%", escape="\\")
+
+def search_products(form: schemas.ProductSearch, params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.ProductResponse]:
+    query = loaders.query(db, models.Product, schemas.ProductResponse).join(models.ProductCategory, models.Product.category_id == models.ProductCategory.id).join(models.ProductGroup, models.ProductCategory.group_id == models.ProductGroup.id)
+    terms = [
+        (models.ProductGroup.name, form.group_name),
+        (models.ProductCategory.name, form.category_name),
+        (models.Product.name, form.product_name),
+        (models.Product.supplier, form.supplier),
+    ]
+    ranks = []
+    for column, term in terms:
+        if not term or not term.strip():
+            continue
+        term = _normalize_term(term)
+        query = query.filter(_contains(column, term))
+        ranks.append(func.word_similarity(term, _searchable(column), type_=Float))
     if form.min_price and not form.max_price:
         query = query.filter(models.Product.price >= form.min_price)
     if form.max_price and not form.min_price:
@@ -172,9 +411,16 @@ def search_products(form: schemas.ProductSearch, db: Session = Depends(get_db))
     if form.quantity is True:
         query = query.filter(models.Product.quantity > 0)
     
-    db_products = query.all()
+    if ranks:
+        # word_similarity is a real, which does not survive the round trip
+        # through the cursor exactly; a fixed-scale numeric does, so rows tied
+        # on rank are ordered, and resumed, by id alone
+        rank = func.round(cast(sum(ranks[1:], ranks[0]), Numeric), 5, type_=Numeric)
+        page = pagination.paginate(query, schemas.ProductResponse, params, keys=[rank, models.Product.id], descending=True)
+    else:
+        page = pagination.paginate(query, schemas.ProductResponse, params)
     
-    if not db_products:
+    if not page.items and params.cursor is None:
         raise HTTPException(status_code=404, detail="Products not found")
     
-    return [schemas.ProductResponse.model_validate(product) for product in db_products]
\ No newline at end of file
+    return page
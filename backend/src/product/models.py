@@ -1,46 +1,55 @@
 from database import Base
-from sqlalchemy import Column, String, Integer, Double, ForeignKey, TIMESTAMP, text
+from sqlalchemy import Column, String, Integer, Double, ForeignKey, TIMESTAMP, JSON, text
 from sqlalchemy.orm import relationship
 
 class Product(Base):
     __tablename__ = 'products'
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, index=True, nullable=False)
     image = Column(String, nullable=False)
-    price = Column(Double, index=True, nullable=False)
-    discount_price = Column(Double, index=True)
+    price = Column(Double, nullable=False)
+    discount_price = Column(Double)
     quantity = Column(Integer)
     description = Column(String, nullable=False)
     supplier = Column(String, index=True, nullable=False)
-    group_id = Column(Integer, ForeignKey('product_group.id'), nullable=False)
-    category_id = Column(Integer, ForeignKey('product_category.id'), nullable=False)
+    group_id = Column(Integer, ForeignKey('product_group.id', ondelete='CASCADE'), index=True, nullable=False)
+    category_id = Column(Integer, ForeignKey('product_category.id', ondelete='CASCADE'), index=True, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     
-    product_group = relationship("ProductGroup", back_populates="products", cascade="all, delete")
-    product_category = relationship("ProductCategory", back_populates="products", cascade="all, delete")
-    order_details = relationship("OrderDetail", back_populates="product", cascade="all, delete")
+    product_group = relationship("ProductGroup", back_populates="products")
+    product_category = relationship("ProductCategory", back_populates="products")
+    order_details = relationship("OrderDetail", back_populates="product", cascade="all, delete", passive_deletes=True)
 
 class ProductGroup(Base):
     __tablename__ = 'product_group'
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, index=True, unique=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))  
     
-    products = relationship("Product", back_populates="product_group", cascade="all, delete")
-    product_categories = relationship("ProductCategory", back_populates="product_group", cascade="all, delete")
+    products = relationship("Product", back_populates="product_group", cascade="all, delete", passive_deletes=True)
+    product_categories = relationship("ProductCategory", back_populates="product_group", cascade="all, delete", passive_deletes=True)
     
 class ProductCategory(Base):
     __tablename__ = 'product_category'
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, index=True, unique=True)
-    group_id = Column(Integer, ForeignKey('product_group.id'), nullable=False)
+    group_id = Column(Integer, ForeignKey('product_group.id', ondelete='CASCADE'), index=True, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     
     product_group = relationship("ProductGroup", back_populates="product_categories")
-    products = relationship("Product", back_populates="product_category", cascade="all, delete")
\ No newline at end of file
+    products = relationship("Product", back_populates="product_category", cascade="all, delete", passive_deletes=True)
+
+class InventoryUpdate(Base):
+    __tablename__ = 'inventory_updates'
+    
+    # one row per Idempotency-Key sent to the batch inventory endpoint
+    idempotency_key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    response = Column(JSON)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
@@ -1,83 +1,127 @@
-from fastapi import APIRouter, Depends
+import hashlib
+import tempfile
+from fastapi import APIRouter, Depends, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from product import models
 from product import controllers
-from database import get_db
-from sqlalchemy.orm import Session
+from database import AnySession, get_db, get_read_session, get_session, run
+from responses import ValidatedRoute
 from product import schemas
-from typing import List
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import pagination
+import streaming
 
-#product router
-product_router = APIRouter(prefix="/product", tags=['Product'])
-search_product_router = APIRouter(prefix="/product/search", tags=['Product Search'])
+# request bodies above this size spill from memory to a temp file
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
 
-@product_router.get('', response_model=List[schemas.ProductResponse])
-def get_products(db: Session = Depends(get_db)):
-    return controllers.get_products(db)
+#product router
+product_router = APIRouter(prefix="/product", tags=['Product'], route_class=ValidatedRoute)
+search_product_router = APIRouter(prefix="/product/search", tags=['Product Search'], route_class=ValidatedRoute)
+
+@product_router.get('', response_model=pagination.Page[schemas.ProductResponse])
+async def get_products(params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_products, params, db=db)
+
+@product_router.get('/export')
+async def export_products(format: streaming.FileFormat = streaming.FileFormat.CSV):
+    return StreamingResponse(controllers.export_products(format), media_type=streaming.MEDIA_TYPES[format])
+
+@product_router.post('/import', response_model=schemas.ProductImportResult)
+async def import_products(request: Request, format: streaming.FileFormat = streaming.FileFormat.CSV, db: Session = Depends(get_db)):
+    # COPY needs a psycopg2 connection, so bulk import always uses the sync session
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        return await run(controllers.import_products, spool, format, db=db)
 
 @product_router.get('/{product_id}', response_model=schemas.ProductResponse)
-def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
-    return controllers.get_product_by_id(product_id, db)
+async def get_product_by_id(product_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_product_by_id, product_id, db=db)
 
 @product_router.post('', status_code=201, response_model=schemas.ProductResponse)
-def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
-    return controllers.create_product(product, db)
+async def create_product(product: schemas.ProductCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.create_product, product, db=db)
+
+@product_router.put('/inventory', response_model=schemas.InventoryUpdateResult)
+async def update_inventory(inventory: schemas.InventoryUpdate, db: AnySession = Depends(get_session), idempotency_key: Optional[str] = Header(None)):
+    return await run(controllers.update_inventory, inventory, db=db, idempotency_key=idempotency_key)
 
 @product_router.put('/{product_id}', response_model=schemas.ProductResponse) 
-def update_product(product_id: int, product: schemas.ProductUpdate, db: Session = Depends(get_db)):
-    return controllers.update_product(product_id, product, db)
+async def update_product(product_id: int, product: schemas.ProductUpdate, db: AnySession = Depends(get_session)):
+    return await run(controllers.update_product, product_id, product, db=db)
 
 @product_router.delete('/{product_id}')
-def delete_product(product_id: int, db: Session = Depends(get_db)):
-    return controllers.delete_product(product_id, db)
+async def delete_product(product_id: int, db: AnySession = Depends(get_session)):
+    return await run(controllers.delete_product, product_id, db=db)
 
 
 # product group router
-product_group_router = APIRouter(prefix="/group", tags=['Product Group'])
+product_group_router = APIRouter(prefix="/group", tags=['Product Group'], route_class=ValidatedRoute)
 
 @product_group_router.get('', response_model=List[schemas.ProductGroupResponse])
-def get_product_groups(db: Session = Depends(get_db)):
-    return controllers.get_product_groups(db)
+async def get_product_groups(db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_product_groups, db=db)
 
 @product_group_router.get('/{group_id}', response_model=schemas.ProductGroupResponse)
-def get_product_group_by_id(group_id: int, db: Session = Depends(get_db)):
-    return controllers.get_product_group_by_id(group_id, db)
+async def get_product_group_by_id(group_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_product_group_by_id, group_id, db=db)
 
 @product_group_router.post('', status_code=201, response_model=schemas.ProductGroupResponse)
-def create_product_group(group: schemas.ProductGroupCreate, db: Session = Depends(get_db)):
-    return controllers.create_product_group(group, db)
+async def create_product_group(group: schemas.ProductGroupCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.create_product_group, group, db=db)
 
 @product_group_router.put('/{group_id}', response_model=schemas.ProductGroupResponse)
-def update_product_group(group_id: int, group: schemas.ProductGroupUpdate, db: Session = Depends(get_db)):
-    return controllers.update_product_group(group_id, group, db)
+async def update_product_group(group_id: int, group: schemas.ProductGroupUpdate, db: AnySession = Depends(get_session)):
+    return await run(controllers.update_product_group, group_id, group, db=db)
 
 @product_group_router.delete('/{group_id}')
-def delete_product_group(group_id: int, db: Session = Depends(get_db)):
-    return controllers.delete_product_group(group_id, db)
+async def delete_product_group(group_id: int, db: AnySession = Depends(get_session)):
+    return await run(controllers.delete_product_group, group_id, db=db)
 
 
 # product category router
-product_category_router = APIRouter(prefix="/category", tags=['Product Category'])
+product_category_router = APIRouter(prefix="/category", tags=['Product Category'], route_class=ValidatedRoute)
 @product_category_router.get('', response_model=List[schemas.ProductCategoryResponse])
-def get_product_categories(db: Session = Depends(get_db)):
-    return controllers.get_product_categories(db)
+async def get_product_categories(db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_product_categories, db=db)
 
 @product_category_router.get('/{category_id}', response_model=schemas.ProductCategoryResponse)
-def get_product_category_by_id(category_id: int, db: Session = Depends(get_db)):
-    return controllers.get_product_category_by_id(category_id, db)
+async def get_product_category_by_id(category_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_product_category_by_id, category_id, db=db)
 
 @product_category_router.post('', status_code=201)
-def create_product_category(category: schemas.ProductCategoryCreate, db: Session = Depends(get_db)):
-    return controllers.create_product_category(category, db)
+async def create_product_category(category: schemas.ProductCategoryCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.create_product_category, category, db=db)
 
 @product_category_router.put('/{category_id}')
-def update_product_category(category_id: int, category: schemas.ProductCategoryUpdate, db: Session = Depends(get_db)):
-    return controllers.update_product_category(category_id, category, db)
+async def update_product_category(category_id: int, category: schemas.ProductCategoryUpdate, db: AnySession = Depends(get_session)):
+    return await run(controllers.update_product_category, category_id, category, db=db)
 
 @product_category_router.delete('/{category_id}')
-def delete_product_category(category_id: int, db: Session = Depends(get_db)):
-    return controllers.delete_product_category(category_id, db)
+async def delete_product_category(category_id: int, db: AnySession = Depends(get_session)):
+    return await run(controllers.delete_product_category, category_id, db=db)
+
+# catalog tree router
+catalog_router = APIRouter(prefix="/catalog", tags=['Catalog'], route_class=ValidatedRoute)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix still matches
+    if if_none_match is None:
+        return False
+    return any(candidate.strip().removeprefix("W/") in (etag, "*") for candidate in if_none_match.split(","))
+
+@catalog_router.get('/tree', response_model=List[schemas.CatalogGroup])
+async def get_catalog_tree(db: AnySession = Depends(get_read_session), if_none_match: Optional[str] = Header(None)):
+    # the session only connects when the tree has to be rebuilt
+    tree = await run(controllers.get_catalog_tree, db=db)
+    headers = {"ETag": f'"{hashlib.sha256(tree).hexdigest()}"', "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=tree, media_type="application/json", headers=headers)
 
 # product search router
-@search_product_router.post('')
-def search_products(form: schemas.ProductSearch, db: Session = Depends(get_db)):
-    return controllers.search_products(form, db)
\ No newline at end of file
+@search_product_router.post('', response_model=pagination.Page[schemas.ProductResponse])
+async def search_products(form: schemas.ProductSearch, params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.search_products, form, params, db=db)
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 
 # Product schema
 class ProductBase(BaseModel):
@@ -86,6 +87,18 @@ class ProductCategoryResponse(BaseModel):
     }
     
 
+# Catalog tree schema
+class CatalogCategory(BaseModel):
+    id: int
+    name: str
+    product_count: int
+    
+class CatalogGroup(BaseModel):
+    id: int
+    name: str
+    product_count: int
+    categories: List[CatalogCategory]
+    
 class ProductSearch(BaseModel):
     group_name: Optional[str] = None
     category_name: Optional[str] = None
@@ -113,4 +126,60 @@ class ProductResponse(BaseModel):
     
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }    
+    
+# Bulk import schema
+class ProductImport(ProductBase):
+    id: Optional[int] = None
+    discount_price: float = 0
+    group_id: int
+    category_id: int
+    
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+    
+class ProductImportResult(BaseModel):
+    created: int
+    updated: int
+    error_count: int
+    errors: List[ProductImportError]
+    
+# Batch inventory schema
+class InventoryStatus(str, Enum):
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+    REJECTED = "rejected"
+    
+class InventoryItem(BaseModel):
+    product_id: int
+    # absolute stock level, or a change applied to the current one
+    quantity: Optional[int] = None
+    quantity_delta: Optional[int] = None
+    price: Optional[float] = None
+    discount_price: Optional[float] = None
+    
+    @model_validator(mode='after')
+    def check_quantity(self):
+        if self.quantity is not None and self.quantity_delta is not None:
+            raise ValueError("quantity and quantity_delta are mutually exclusive")
+        if self.quantity is not None and self.quantity < 0:
+            raise ValueError("quantity must not be negative")
+        return self
+    
+class InventoryUpdate(BaseModel):
+    items: List[InventoryItem] = Field(min_length=1, max_length=10000)
+    
+class InventoryItemResult(BaseModel):
+    product_id: int
+    status: InventoryStatus
+    quantity: Optional[int] = None
+    price: Optional[float] = None
+    discount_price: Optional[float] = None
+    detail: Optional[str] = None
+    
+class InventoryUpdateResult(BaseModel):
+    updated: int
+    not_found: int
+    rejected: int
+    items: List[InventoryItemResult]
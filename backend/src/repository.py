@@ -0,0 +1,47 @@
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+import loaders
+
+# Single-statement writes. Each replaces the SELECT / UPDATE / refresh
+# sequence with one UPDATE or DELETE ... RETURNING, and a missing row
+# surfaces as the zero-row result instead of a separate existence check.
+# Callers commit; responses are built from the returned row before that,
+# so the commit does not expire them into another SELECT.
+
+
+def update_where(db: Session, model, schema, values: dict, *criteria, detail: str = "Not found", options: tuple = ()):
+    # Returns the first updated row as `schema`; embedded relationships come
+    # from one selectin query per level. `options` adds loader options such as
+    # with_expression, whose expressions are evaluated in the RETURNING clause.
+    if not values:
+        # nothing to set; an empty UPDATE is not valid SQL
+        statement = select(model).where(*criteria).options(*loaders.options_for(model, schema), *options).execution_options(populate_existing=True)
+    else:
+        statement = (
+            update(model)
+            .where(*criteria)
+            .values(**values)
+            .returning(model)
+            .options(*loaders.options_for(model, schema, dml=True), *options)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+    instance = db.execute(statement).scalars().first()
+    if instance is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return schema.model_validate(instance)
+
+
+def update_by_id(db: Session, model, schema, row_id: int, values: dict, detail: str = "Not found", options: tuple = ()):
+    return update_where(db, model, schema, values, model.id == row_id, detail=detail, options=options)
+
+
+def delete_by_id(db: Session, model, row_id: int, detail: str = "Not found") -> int:
+    # Bypasses ORM cascades, so only for rows whose dependants the database
+    # removes itself (or that have none)
+    statement = delete(model).where(model.id == row_id).returning(model.id).execution_options(synchronize_session=False)
+    deleted = db.execute(statement).scalar_one_or_none()
+    if deleted is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return deleted
@@ -0,0 +1,65 @@
+import asyncio
+import functools
+from typing import Any, get_args, get_origin
+
+from fastapi import Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _is_model(content) -> bool:
+    return isinstance(content, BaseModel) or (isinstance(content, list) and bool(content) and isinstance(content[0], BaseModel))
+
+
+class FastJSONResponse(Response):
+    # Response models are encoded by pydantic-core in one pass; anything else
+    # goes through orjson, falling back to pydantic for the types it lacks
+    # (Decimal, models nested in dicts). Bytes are sent as already encoded.
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if _is_model(content) or orjson is None:
+            return to_json(content)
+        return orjson.dumps(content, default=to_jsonable_python)
+
+
+def _is_instance_of(content, response_model) -> bool:
+    # exact types only: a subclass may carry fields response_model would drop
+    if type(content) is response_model:
+        return True
+    if get_origin(response_model) is list and isinstance(content, list):
+        (item_type,) = get_args(response_model)
+        return all(type(item) is item_type for item in content)
+    return False
+
+
+class ValidatedRoute(APIRoute):
+    # Controllers already return instances of the route's response_model, so
+    # the endpoint's result is encoded as is. Left to FastAPI it would be
+    # dumped, validated against response_model again and then encoded.
+    # Anything else (a subclass, an ORM object, a dict for a model route) is
+    # handed back to FastAPI to be filtered and validated as usual.
+    def __init__(self, path: str, endpoint, *, status_code: int = None, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = self._encoded(endpoint, status_code or 200)
+        super().__init__(path, endpoint, status_code=status_code, **kwargs)
+
+    def _encoded(self, endpoint, status_code: int):
+        @functools.wraps(endpoint)
+        async def encoded(*args, **kwargs):
+            content = await endpoint(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+            # self.response_model is resolved by APIRoute.__init__, after this wrapper is built
+            if self.response_model is None or _is_instance_of(content, self.response_model):
+                return FastJSONResponse(content, status_code=status_code)
+            return content
+        return encoded
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import Iterable, Iterator, Sequence
+
+from database import read_session
+
+
+class FileFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    FileFormat.CSV: "text/csv",
+    FileFormat.NDJSON: "application/x-ndjson",
+}
+
+STREAM_BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_rows(rows: Iterable[Sequence], columns: Sequence[str], file_format: FileFormat, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    # Encodes rows incrementally, one chunk per batch, so memory stays flat
+    # no matter how many rows the source yields.
+    buffer = io.StringIO()
+    if file_format == FileFormat.CSV:
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False))
+            buffer.write("\n")
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_rows(statement, file_format: FileFormat) -> Iterator[bytes]:
+    # The response streams after the request's dependencies are torn down, so
+    # the export owns its session and reads through a server-side cursor.
+    db = read_session()
+    try:
+        result = db.execute(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        yield from encode_rows(result, list(result.keys()), file_format)
+    finally:
+        db.close()
+
+
+def decode_records(source: io.BufferedIOBase, file_format: FileFormat) -> Iterator[tuple]:
+    # Yields (line number, record dict or None, error message or None)
+    text_source = io.TextIOWrapper(source, encoding="utf-8", errors="replace", newline="")
+    if file_format == FileFormat.CSV:
+        reader = csv.DictReader(text_source)
+        for record in reader:
+            if None in record:
+                yield reader.line_num, None, "Too many fields"
+                continue
+            # empty cells are treated as absent so schema defaults apply
+            yield reader.line_num, {key: value for key, value in record.items() if value not in ("", None)}, None
+        return
+
+    for line_number, line in enumerate(text_source, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
@@ -0,0 +1,104 @@
+import struct
+import sys
+from datetime import datetime
+from os import environ
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# database.py builds its (unused here) Postgres engine at import
+for name, value in (('DB_USER', 'test'), ('DB_PASSWORD', 'test'), ('DB_HOST', 'localhost'), ('DB_PORT', '5432'), ('DB_NAME', 'test'), ('SECRET_KEY', 'test'), ('ALGORITHM', 'HS256')):
+    environ.setdefault(name, value)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import database
+from database import Base
+from analytics import models as analytics_models
+from cache import catalog
+from user.models import Transaction, User
+from order.models import Order, OrderDetail
+from product.models import Product, ProductCategory, ProductGroup
+
+
+def _real(value: float) -> float:
+    # rounded to float4, the type pg_trgm returns
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def _word_similarity(term: str, text: str) -> float:
+    # stand-in for pg_trgm: a substring match scored by the share of the text it covers
+    return _real(len(term) / len(text)) if text and term in text else 0.0
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+
+    @event.listens_for(engine, 'connect')
+    def _connect(connection, record):
+        connection.create_function('now', 0, lambda: datetime.now().isoformat(' '))
+        connection.create_function('f_unaccent', 1, lambda text: text)
+        connection.create_function('word_similarity', 2, _word_similarity)
+        # SQLite only enforces ON DELETE CASCADE with this set
+        connection.execute('PRAGMA foreign_keys=ON')
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    catalog.local.clear()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(engine, db, monkeypatch):
+    # the routes open their sessions from database.SessionLocal
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine, autoflush=False))
+    from main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def statements(engine):
+    # statements sent to the database since the last reset
+    executed = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+def seed(db, n: int):
+    # n products in each of two new groups (one category each) and n new users,
+    # each with an order for one product of every group and a deposit
+    now = datetime.now()
+    groups, users = db.query(ProductGroup).count(), db.query(User).count()
+    products = []
+    for g in range(groups, groups + 2):
+        group = ProductGroup(name=f'group {g}', created_at=now, updated_at=now)
+        db.add(group)
+        db.flush()
+        category = ProductCategory(name=f'category {g}', group_id=group.id, created_at=now, updated_at=now)
+        db.add(category)
+        db.flush()
+        group_products = [Product(name=f'product {g}-{i}', image='image', price=10 + i, discount_price=0, quantity=5, description='description', supplier='supplier', group_id=group.id, category_id=category.id, created_at=now, updated_at=now) for i in range(n)]
+        db.add_all(group_products)
+        products.append(group_products)
+    db.flush()
+    for u in range(users, users + n):
+        user = User(email=f'user{u}@example.com', password='x', username=f'user{u}', phone_number='0123456789', role='CUSTOMER', wallet_balance=0, created_at=now, updated_at=now)
+        db.add(user)
+        db.flush()
+        order = Order(user_id=user.id, total_amount=20, order_date=now, updated_at=now)
+        db.add(order)
+        db.flush()
+        db.add_all([OrderDetail(order_id=order.id, product_id=group_products[u - users].id, quantity=1, unit_price=10, created_at=now, updated_at=now) for group_products in products])
+        db.add(Transaction(user_id=user.id, old_amount=0, new_amount=20, total_amount=20, transaction_type='DEPOSIT', created_at=now, updated_at=now))
+    db.commit()
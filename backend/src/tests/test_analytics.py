@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from analytics import controllers as analytics_controllers
+from analytics import schemas as analytics_schemas
+from analytics.models import ProductSalesDaily
+from conftest import seed
+from product import controllers as product_controllers
+
+
+def test_deleting_a_product_keeps_its_sales_history(db):
+    seed(db, 2)
+    day = date.today() - timedelta(days=30)
+    db.add_all([
+        ProductSalesDaily(day=day, product_id=1, order_count=3, quantity=4, revenue=Decimal('40')),
+        ProductSalesDaily(day=day, product_id=2, order_count=1, quantity=1, revenue=Decimal('11')),
+    ])
+    db.commit()
+
+    product_controllers.delete_product(1, db)
+
+    assert db.query(ProductSalesDaily).count() == 2
+    top = analytics_controllers.get_top_products(analytics_schemas.SalesMetric.REVENUE, db=db)
+    assert [(row.product_id, row.name, row.revenue) for row in top] == [(1, None, 40), (2, 'product 0-1', 11)]
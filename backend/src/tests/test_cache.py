@@ -0,0 +1,97 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from cache import TOMBSTONE, TieredCache, TTLCache
+from conftest import seed
+from product import controllers as product_controllers
+from product import schemas as product_schemas
+
+
+@pytest.fixture
+def shared():
+    # stands in for the Redis tier: same get/set/add/delete interface
+    return TTLCache(ttl=600)
+
+
+@pytest.fixture
+def catalog(shared, monkeypatch):
+    tiered = TieredCache(TTLCache(), shared, hold=60)
+    monkeypatch.setattr(product_controllers, 'catalog', tiered)
+    return tiered
+
+
+def test_add_get_and_invalidate(shared):
+    writer = TieredCache(TTLCache(), shared, hold=60)
+    other = TieredCache(TTLCache(ttl=0.05), shared, hold=60)
+
+    writer.add('key', b'v1')
+    assert writer.get('key') == b'v1'
+    assert other.get('key') == b'v1'
+
+    writer.invalidate('key')
+    assert writer.get('key') is None
+    # a read that began before the write cannot put the old value back
+    writer.add('key', b'stale')
+    other.add('key', b'stale')
+    assert writer.get('key') is None
+    assert shared.get('key') == TOMBSTONE
+
+    # other workers' local copies are not invalidated; they only live for their short TTL
+    time.sleep(0.06)
+    assert other.get('key') is None
+
+
+def test_invalidated_key_is_repopulated_after_the_hold(shared):
+    cache = TieredCache(TTLCache(), shared, hold=0.05)
+    cache.add('key', b'v1')
+    cache.invalidate('key')
+    cache.add('key', b'v2')
+    assert cache.get('key') is None
+
+    time.sleep(0.06)
+    cache.add('key', b'v2')
+    assert cache.get('key') == b'v2'
+
+
+def _cache_products(db, *product_ids):
+    for product_id in product_ids:
+        product_controllers.get_product_by_id(product_id, db)
+
+
+def test_renaming_a_group_invalidates_its_products(db, catalog):
+    seed(db, 2)
+    _cache_products(db, 1, 3)
+
+    product_controllers.update_product_group(1, product_schemas.ProductGroupUpdate(name='renamed', updated_at=datetime.now()), db)
+
+    assert catalog.get(product_controllers._product_key(1)) is None
+    assert catalog.get(product_controllers._product_key(3)) is not None
+    db.expire_all()
+    assert product_controllers.get_product_by_id(1, db).product_category.product_group.name == 'renamed'
+
+
+def test_renaming_a_category_invalidates_its_products(db, catalog):
+    seed(db, 2)
+    _cache_products(db, 1, 3)
+
+    product_controllers.update_product_category(1, product_schemas.ProductCategoryUpdate(name='renamed', updated_at=datetime.now()), db)
+
+    assert catalog.get(product_controllers._product_key(1)) is None
+    assert catalog.get(product_controllers._product_key(3)) is not None
+    db.expire_all()
+    assert product_controllers.get_product_by_id(1, db).product_category.name == 'renamed'
+
+
+def test_product_update_invalidates_the_product_and_the_tree(db, catalog):
+    seed(db, 2)
+    _cache_products(db, 1, 2)
+    product_controllers.get_catalog_tree(db)
+
+    product_controllers.update_product(1, product_schemas.ProductUpdate(price=99, updated_at=datetime.now()), db)
+
+    assert catalog.get(product_controllers._product_key(1)) is None
+    assert catalog.get(product_controllers.CATALOG_TREE_KEY) is None
+    assert catalog.get(product_controllers._product_key(2)) is not None
+    assert product_controllers.get_product_by_id(1, db).price == 99
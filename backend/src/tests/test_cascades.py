@@ -0,0 +1,72 @@
+import pytest
+from fastapi import HTTPException
+
+from conftest import seed
+from order import controllers as order_controllers
+from order.models import Order, OrderDetail
+from product import controllers as product_controllers
+from product.models import Product, ProductCategory, ProductGroup
+from user import controllers as user_controllers
+from user.models import Transaction, User
+
+ADMIN = {'role': 'admin', 'id': None}
+
+
+def _counts(db):
+    return {model.__name__: db.query(model).count() for model in (ProductGroup, ProductCategory, Product, User, Order, OrderDetail, Transaction)}
+
+
+def _delete_twice(delete, db):
+    delete(db)
+    db.expunge_all()
+    counts = _counts(db)
+    with pytest.raises(HTTPException) as error:
+        delete(db)
+    assert error.value.status_code == 404
+    return counts
+
+
+@pytest.fixture
+def seeded(db):
+    # two groups of three products, three users with one two-line order each
+    seed(db, 3)
+    return _counts(db)
+
+
+def test_delete_product_group_cascades(db, seeded):
+    counts = _delete_twice(lambda db: product_controllers.delete_product_group(1, db), db)
+
+    assert counts == {**seeded, 'ProductGroup': 1, 'ProductCategory': 1, 'Product': 3, 'OrderDetail': 3}
+    assert db.query(Product).filter(Product.group_id == 1).count() == 0
+    assert db.query(ProductCategory).filter(ProductCategory.group_id == 1).count() == 0
+
+
+def test_delete_product_category_cascades(db, seeded):
+    counts = _delete_twice(lambda db: product_controllers.delete_product_category(2, db), db)
+
+    assert counts == {**seeded, 'ProductCategory': 1, 'Product': 3, 'OrderDetail': 3}
+    assert db.query(Product).filter(Product.category_id == 2).count() == 0
+    assert db.query(OrderDetail).join(Product).filter(Product.category_id == 1).count() == 3
+
+
+def test_delete_product_cascades(db, seeded):
+    counts = _delete_twice(lambda db: product_controllers.delete_product(1, db), db)
+
+    assert counts == {**seeded, 'Product': 5, 'OrderDetail': 5}
+    assert db.query(OrderDetail).filter(OrderDetail.product_id == 1).count() == 0
+
+
+def test_delete_user_cascades(db, seeded):
+    counts = _delete_twice(lambda db: user_controllers.delete_user(1, db, ADMIN), db)
+
+    assert counts == {**seeded, 'User': 2, 'Order': 2, 'OrderDetail': 4, 'Transaction': 2}
+    assert db.query(Order).filter(Order.user_id == 1).count() == 0
+    assert db.query(Transaction).filter(Transaction.user_id == 1).count() == 0
+
+
+def test_delete_order_cascades(db, seeded):
+    counts = _delete_twice(lambda db: order_controllers.delete_order(1, db), db)
+
+    assert counts == {**seeded, 'Order': 2, 'OrderDetail': 4}
+    assert db.query(OrderDetail).filter(OrderDetail.order_id == 1).count() == 0
+    assert db.query(User).filter(User.id == 1).count() == 1
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import seed
+
+NOW = datetime.now().isoformat()
+
+
+def _etag(client):
+    response = client.get('/api/catalog/tree')
+    assert response.status_code == 200
+    return response.headers['etag']
+
+
+def test_catalog_tree_etag_is_stable(client, db):
+    seed(db, 3)
+    etag = _etag(client)
+    assert _etag(client) == etag
+
+    response = client.get('/api/catalog/tree', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+    # weak and list forms compare the same way
+    assert client.get('/api/catalog/tree', headers={'If-None-Match': f'"other", W/{etag}'}).status_code == 304
+    assert client.get('/api/catalog/tree', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+PRODUCT = {'name': 'new product', 'image': 'image', 'price': 10, 'discount_price': 0, 'quantity': 5, 'description': 'description', 'supplier': 'supplier', 'group_id': 1, 'category_id': 1, 'created_at': NOW, 'updated_at': NOW}
+
+WRITES = {
+    'create product': lambda client: client.post('/api/product', json=PRODUCT),
+    'delete product': lambda client: client.delete('/api/product/1'),
+    'rename category': lambda client: client.put('/api/category/1', json={'name': 'renamed', 'updated_at': NOW}),
+    'create category': lambda client: client.post('/api/category', json={'name': 'new category', 'group_id': 1, 'created_at': NOW}),
+    'rename group': lambda client: client.put('/api/group/1', json={'name': 'renamed', 'updated_at': NOW}),
+    'delete group': lambda client: client.delete('/api/group/1'),
+}
+
+
+@pytest.mark.parametrize('name', WRITES)
+def test_catalog_writes_change_the_etag(name, client, db):
+    seed(db, 3)
+    etag = _etag(client)
+
+    assert WRITES[name](client).status_code in (200, 201)
+
+    assert _etag(client) != etag
+    assert client.get('/api/catalog/tree', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+import pytest
+
+from cache import TieredCache, TTLCache
+from conftest import seed
+from order.models import Order, OrderDetail
+from product import controllers as product_controllers
+from product.models import Product
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    tiered = TieredCache(TTLCache(), hold=60)
+    monkeypatch.setattr(product_controllers, 'catalog', tiered)
+    return tiered
+
+
+@pytest.fixture
+def products(db):
+    # product 1 at full price (10), product 2 discounted from 11 to 7; 5 of each in stock
+    seed(db, 3)
+    db.get(Product, 2).discount_price = 7
+    db.commit()
+    return db
+
+
+def _stock(db):
+    db.expire_all()
+    return {product.id: product.quantity for product in db.query(Product)}
+
+
+def test_checkout_prices_lines_and_decrements_stock(client, products, catalog):
+    db = products
+    stock = _stock(db)
+    for product_id in (1, 2, 3):
+        product_controllers.get_product_by_id(product_id, db)
+
+    response = client.post('/api/order/checkout', json={'user_id': 1, 'items': [
+        {'product_id': 2, 'quantity': 2}, {'product_id': 1, 'quantity': 1}, {'product_id': 2, 'quantity': 1},
+    ]})
+
+    assert response.status_code == 201
+    order = response.json()
+    lines = {line['product_id']: line for line in order['order_details']}
+    assert (Decimal(lines[1]['unit_price']), lines[1]['quantity']) == (10, 1)
+    assert (Decimal(lines[2]['unit_price']), lines[2]['quantity']) == (7, 3)
+    assert Decimal(order['total_amount']) == 31
+    assert _stock(db) == {**stock, 1: stock[1] - 1, 2: stock[2] - 3}
+
+    assert catalog.get(product_controllers._product_key(1)) is None
+    assert catalog.get(product_controllers._product_key(2)) is None
+    assert catalog.get(product_controllers._product_key(3)) is not None
+
+
+def test_insufficient_stock_rolls_back_every_line(client, products, catalog):
+    db = products
+    stock = _stock(db)
+    orders, details = db.query(Order).count(), db.query(OrderDetail).count()
+    product_controllers.get_product_by_id(1, db)
+
+    response = client.post('/api/order/checkout', json={'user_id': 1, 'items': [
+        {'product_id': 1, 'quantity': 1}, {'product_id': 2, 'quantity': stock[2] + 1},
+    ]})
+
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Insufficient stock for product 2'}
+    assert _stock(db) == stock
+    assert (db.query(Order).count(), db.query(OrderDetail).count()) == (orders, details)
+    assert catalog.get(product_controllers._product_key(1)) is not None
+
+
+@pytest.mark.parametrize('items, status, detail', [
+    ([], 400, 'Order has no items'),
+    ([{'product_id': 1, 'quantity': 0}], 400, 'Invalid quantity'),
+    ([{'product_id': 1, 'quantity': 1}, {'product_id': 999, 'quantity': 1}], 404, 'Product 999 not found'),
+])
+def test_invalid_checkout_creates_nothing(items, status, detail, client, products):
+    db = products
+    stock = _stock(db)
+    orders = db.query(Order).count()
+
+    response = client.post('/api/order/checkout', json={'user_id': 1, 'items': items})
+
+    assert (response.status_code, response.json()) == (status, {'detail': detail})
+    assert _stock(db) == stock
+    assert db.query(Order).count() == orders
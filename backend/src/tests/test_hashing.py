@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from user import hashing
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # threads stand in for the worker processes; one worker and no queue
+    # (HASH_QUEUE_DEPTH=0), so a second job has nowhere to wait
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(hashing, 'HASH_WORKERS', 1)
+    monkeypatch.setattr(hashing, 'HASH_QUEUE_DEPTH', 0)
+    monkeypatch.setattr(hashing, '_slots', threading.BoundedSemaphore(hashing.HASH_WORKERS + hashing.HASH_QUEUE_DEPTH))
+    monkeypatch.setattr(hashing, '_get_pool', lambda: executor)
+    monkeypatch.setattr(hashing, 'pwd_context', hashing.CryptContext(schemes=["bcrypt"], bcrypt__rounds=4))
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def busy(pool):
+    # occupies the only slot until set
+    release = threading.Event()
+    future = hashing._submit(release.wait)
+    yield release
+    release.set()
+    future.result()
+
+
+def test_full_queue_is_refused_with_retry_after(busy):
+    with pytest.raises(HTTPException) as error:
+        hashing.hash_password('password')
+    assert error.value.status_code == 503
+    assert error.value.headers == {'Retry-After': str(hashing.HASH_RETRY_AFTER)}
+
+
+def test_slot_is_released_when_the_job_finishes(busy):
+    busy.set()
+    # the done callback frees the slot once the blocking job returns
+    for _ in range(100):
+        if hashing._slots.acquire(timeout=0.05):
+            hashing._slots.release()
+            break
+    assert hashing.verify_password('password', hashing.hash_password('password'))
+
+
+def test_saturated_hashing_returns_503_from_the_api(client, busy):
+    response = client.post('/api/user', json={
+        'email': 'new@example.com', 'password': 'password1', 'username': 'newuser', 'phone_number': '0123456789',
+        'role': 'CUSTOMER', 'wallet_balance': 0, 'created_at': datetime.now().isoformat(),
+    })
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == str(hashing.HASH_RETRY_AFTER)
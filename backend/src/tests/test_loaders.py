@@ -0,0 +1,41 @@
+import pytest
+
+import pagination
+from cache import catalog
+from conftest import seed
+from order import controllers as order_controllers
+from product import controllers as product_controllers
+from user import controllers as user_controllers
+
+# Statements a listing may issue, however many rows it returns
+MAX_STATEMENTS = 2
+
+LISTINGS = {
+    'users': lambda db: user_controllers.get_users(pagination.PageParams(limit=pagination.MAX_PAGE_SIZE), db),
+    'products': lambda db: product_controllers.get_products(pagination.PageParams(limit=pagination.MAX_PAGE_SIZE), db),
+    'product_groups': product_controllers.get_product_groups,
+    'product_categories': product_controllers.get_product_categories,
+    'orders': lambda db: order_controllers.get_orders(pagination.PageParams(limit=pagination.MAX_PAGE_SIZE), db),
+    'transactions': lambda db: user_controllers.get_transactions(pagination.PageParams(limit=pagination.MAX_PAGE_SIZE), db),
+}
+
+
+def _count(listing, db, statements):
+    # neither the session nor the catalog cache may answer for the database
+    db.expunge_all()
+    catalog.local.clear()
+    statements.clear()
+    listing(db)
+    return len(statements)
+
+
+@pytest.mark.parametrize('name', LISTINGS)
+def test_listing_statements_do_not_grow_with_rows(name, db, statements):
+    listing = LISTINGS[name]
+    seed(db, 10)
+    few = _count(listing, db, statements)
+    seed(db, 90)
+    many = _count(listing, db, statements)
+
+    assert few == many
+    assert many <= MAX_STATEMENTS
@@ -0,0 +1,57 @@
+import base64
+import json
+
+import pytest
+
+import pagination
+from conftest import seed
+from order.models import Order
+from product.models import Product
+
+LISTINGS = {'/api/product': Product, '/api/order': Order}
+
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def _walk(client, url: str, limit: int) -> list:
+    seen, cursor = [], None
+    while True:
+        response = client.get(url, params={'limit': limit, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page['items']) <= limit
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize('url', LISTINGS)
+def test_pages_cover_every_row_once(url, client, db):
+    seed(db, 30)
+    ids = [row_id for (row_id,) in db.query(LISTINGS[url].id).order_by(LISTINGS[url].id)]
+
+    for limit in (1, 7, len(ids), pagination.MAX_PAGE_SIZE):
+        assert _walk(client, url, limit) == ids
+
+
+@pytest.mark.parametrize('url', LISTINGS)
+@pytest.mark.parametrize('cursor', ['not base64!', 'bm90IGpzb24', _cursor('text'), _cursor([1, 2]), _cursor(['abc'])])
+def test_malformed_cursor_is_rejected(url, cursor, client, db):
+    seed(db, 3)
+    response = client.get(url, params={'cursor': cursor})
+    assert response.status_code == 422
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+@pytest.mark.parametrize('url', LISTINGS)
+def test_limit_is_capped(url, client, db):
+    seed(db, pagination.MAX_PAGE_SIZE + 10)
+    assert client.get(url, params={'limit': pagination.MAX_PAGE_SIZE + 1}).status_code == 422
+    assert client.get(url, params={'limit': 0}).status_code == 422
+    page = client.get(url, params={'limit': pagination.MAX_PAGE_SIZE}).json()
+    assert len(page['items']) == pagination.MAX_PAGE_SIZE
+    assert page['next_cursor'] is not None
+    assert len(client.get(url).json()['items']) == pagination.DEFAULT_PAGE_SIZE
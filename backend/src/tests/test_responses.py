@@ -0,0 +1,60 @@
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import pagination
+from responses import FastJSONResponse, ValidatedRoute
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+    model_config = {"from_attributes": True}
+
+
+class ItemWithSecret(Item):
+    secret: str
+
+
+class Row:
+    # an ORM-like object with an attribute the schema does not declare
+    def __init__(self, id, name):
+        self.id, self.name, self.secret = id, name, 'hidden'
+
+
+def _client(result, response_model):
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.router.route_class = ValidatedRoute
+
+    @app.get('/item', response_model=response_model)
+    async def get_item():
+        return result
+
+    return TestClient(app)
+
+
+def test_exact_response_model_is_encoded_as_returned():
+    assert _client(Item(id=1, name='a'), Item).get('/item').json() == {'id': 1, 'name': 'a'}
+    assert _client([Item(id=1, name='a')], List[Item]).get('/item').json() == [{'id': 1, 'name': 'a'}]
+    page = pagination.Page[Item](items=[Item(id=1, name='a')], next_cursor='c')
+    assert _client(page, pagination.Page[Item]).get('/item').json() == {'items': [{'id': 1, 'name': 'a'}], 'next_cursor': 'c'}
+
+
+def test_subclass_is_filtered_by_the_response_model():
+    secret = ItemWithSecret(id=1, name='a', secret='s')
+    assert _client(secret, Item).get('/item').json() == {'id': 1, 'name': 'a'}
+    assert _client([Item(id=1, name='a'), secret], List[Item]).get('/item').json() == [{'id': 1, 'name': 'a'}, {'id': 1, 'name': 'a'}]
+
+
+def test_orm_object_is_validated_by_the_response_model():
+    assert _client(Row(1, 'a'), Item).get('/item').json() == {'id': 1, 'name': 'a'}
+
+
+def test_app_routes_use_validated_route():
+    from main import app
+    routes = [route for route in app.routes if isinstance(route, APIRoute) and route.path.startswith('/api')]
+    assert routes and all(isinstance(route, ValidatedRoute) for route in routes)
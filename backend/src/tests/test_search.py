@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from product.models import Product, ProductCategory, ProductGroup
+
+
+def _seed_ties(db, n: int):
+    # every name has the same length, so every match has the same rank
+    now = datetime.now()
+    group = ProductGroup(name='group', created_at=now, updated_at=now)
+    db.add(group)
+    db.flush()
+    category = ProductCategory(name='category', group_id=group.id, created_at=now, updated_at=now)
+    db.add(category)
+    db.flush()
+    db.add_all([Product(name=f'lamp {i:04}', image='image', price=10, discount_price=0, quantity=5, description='description', supplier='supplier', group_id=group.id, category_id=category.id, created_at=now, updated_at=now) for i in range(n)])
+    db.commit()
+
+
+def test_search_pages_through_tied_ranks(client, db):
+    _seed_ties(db, 25)
+    seen, cursor = [], None
+    while True:
+        response = client.post('/api/product/search', json={'product_name': 'lamp'}, params={'limit': 10, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+        # the rank travels as a fixed-scale decimal, which the database compares exactly
+        rank, _ = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        assert Decimal(rank) == round(Decimal(rank), 5)
+
+    assert len(seen) == len(set(seen)) == 25
+    assert seen == sorted(seen, reverse=True)
@@ -0,0 +1,67 @@
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from user import validation
+
+
+@pytest.fixture(autouse=True)
+def token_cache():
+    validation.token_cache.clear()
+    yield validation.token_cache
+    validation.token_cache.clear()
+
+
+def _validate(token: str) -> dict:
+    return asyncio.run(validation.validate_token(token))
+
+
+def _token(role: str = 'admin', expires: timedelta = timedelta(hours=1)) -> str:
+    return validation.create_access_token({'sub': 'user0@example.com', 'role': role, 'uid': 1}, expires)
+
+
+def _sleep_until(moment: float):
+    time.sleep(max(0, moment - time.time()))
+
+
+def test_cached_principal_expires_with_the_token(token_cache):
+    from jose import jwt
+    token = _token(expires=timedelta(seconds=2))
+    key = hashlib.sha256(token.encode()).digest()
+    assert _validate(token) == {'id': 1, 'email': 'user0@example.com', 'role': 'admin'}
+    assert token_cache.get(key) is not None
+
+    exp = jwt.get_unverified_claims(token)['exp']
+    _sleep_until(exp + 0.05)
+    assert token_cache.get(key) is None
+
+    # python-jose compares exp with whole seconds, so it rejects the token a second later
+    _sleep_until(exp + 1.05)
+    with pytest.raises(HTTPException) as error:
+        _validate(token)
+    assert error.value.status_code == 400
+    assert token_cache.get(key) is None
+
+
+def test_revoked_token_is_not_served_past_the_ttl(monkeypatch):
+    monkeypatch.setattr(validation, 'TOKEN_CACHE_TTL', 0.2)
+    token = _token()
+    assert _validate(token)['role'] == 'admin'
+
+    # rotating the key revokes every issued token; the cached principal
+    # outlives it by at most TOKEN_CACHE_TTL, however far away exp is
+    monkeypatch.setattr(validation, 'SECRET_KEY', 'rotated')
+    assert _validate(token)['role'] == 'admin'
+    time.sleep(0.25)
+    with pytest.raises(HTTPException) as error:
+        _validate(token)
+    assert error.value.status_code == 400
+
+
+def test_reissued_role_is_not_served_from_the_old_entry():
+    assert _validate(_token('admin'))['role'] == 'admin'
+    assert _validate(_token('CUSTOMER', timedelta(minutes=30)))['role'] == 'CUSTOMER'
@@ -0,0 +1,53 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import seed
+from user import controllers as user_controllers
+from user import schemas
+from user.models import Transaction, User
+
+
+def _deposit(db, amount, transaction_type=schemas.TransactionType.DEPOSIT):
+    transaction = schemas.TransactionCreate(user_id=1, new_amount=amount, transaction_type=transaction_type, created_at=datetime.now())
+    return user_controllers.create_transaction(transaction, db, idempotency_key='retry-1')
+
+
+def test_idempotency_key_replays_the_same_request(db):
+    seed(db, 1)
+    first = _deposit(db, Decimal('5'))
+    assert _deposit(db, Decimal('5')) == first
+
+    assert db.query(Transaction).filter(Transaction.idempotency_key == 'retry-1').count() == 1
+    assert db.get(User, 1).wallet_balance == 5
+
+
+@pytest.mark.parametrize('amount, transaction_type', [
+    (Decimal('6'), schemas.TransactionType.DEPOSIT),
+    (Decimal('5'), schemas.TransactionType.WITHDRAW),
+])
+def test_idempotency_key_rejects_a_different_request(db, amount, transaction_type):
+    seed(db, 1)
+    _deposit(db, Decimal('5'))
+    with pytest.raises(HTTPException) as error:
+        _deposit(db, amount, transaction_type)
+    assert error.value.status_code == 409
+    db.expire_all()
+    assert db.get(User, 1).wallet_balance == 5
+
+
+def test_update_by_user_id_changes_only_the_latest_transaction(db):
+    seed(db, 2)
+    latest = _deposit(db, Decimal('5'))
+    before = {row.id: (row.new_amount, row.total_amount) for row in db.query(Transaction)}
+
+    update = schemas.TransactionUpdateByUserId(old_amount=0, new_amount=Decimal('3'), transaction_type=schemas.TransactionType.DEPOSIT, updated_at=datetime.now())
+    updated = user_controllers.update_transaction_by_user_id(1, update, db)
+
+    assert updated.id == latest.id
+    assert (updated.old_amount, updated.total_amount) == (5, 8)
+    db.expire_all()
+    after = {row.id: (row.new_amount, row.total_amount) for row in db.query(Transaction)}
+    assert after == {**before, latest.id: (3, 8)}
@@ -0,0 +1,27 @@
+from datetime import date, datetime, time, timezone
+from typing import Optional, Union
+
+from fastapi import HTTPException
+
+DateOrDatetime = Union[datetime, date]
+
+
+def as_utc(value: DateOrDatetime) -> datetime:
+    # bare dates are the start of that day; naive datetimes are taken as UTC
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def half_open(column, start: Optional[DateOrDatetime], end: Optional[DateOrDatetime]) -> list:
+    # Criteria for start <= column < end; either bound may be left open
+    start = as_utc(start) if start is not None else None
+    end = as_utc(end) if end is not None else None
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
+    criteria = []
+    if start is not None:
+        criteria.append(column >= start)
+    if end is not None:
+        criteria.append(column < end)
+    return criteria
@@ -1,12 +1,20 @@
+import functools
 from datetime import timedelta
 from fastapi import security
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, with_expression
 from fastapi import Depends, HTTPException, status
 from database import get_db
 from user import models
 from user import schemas
 from user import validation
-from typing import List
+from order import models as order_models
+from typing import List, Optional
+import pagination
+import repository
+import streaming
+import timerange
 
 
 from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordBearer
@@ -23,13 +31,34 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     return token
 
-def get_users(db: Session = Depends(get_db)) -> List[schemas.UserResponse]:
-    users = db.query(models.User).all()
+def _history(*columns, model):
+    # correlated explicitly so the subquery also binds to the row in UPDATE ... RETURNING
+    return select(*columns).where(model.user_id == models.User.id).correlate(models.User).scalar_subquery()
+
+# Aggregates returned instead of the full order and transaction history; each
+# is one index range scan on the user's rows, computed with the user's own row.
+# Built on first use: the options configure the mappers, which needs every
+# model module (product.models included) to have been imported.
+@functools.cache
+def user_summary():
+    return (
+        with_expression(models.User.order_count, _history(func.count(), model=order_models.Order)),
+        with_expression(models.User.lifetime_spend, _history(func.coalesce(func.sum(order_models.Order.total_amount), 0), model=order_models.Order)),
+        with_expression(models.User.last_order_date, _history(func.max(order_models.Order.order_date), model=order_models.Order)),
+        with_expression(models.User.transaction_count, _history(func.count(), model=models.Transaction)),
+    )
+
+def _users(db: Session):
+    return db.query(models.User).options(*user_summary()).populate_existing()
+
+def get_users(params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.UserResponse]:
+    query = _users(db)
+    page = pagination.paginate(query, schemas.UserResponse, params)
     
-    if not users:
+    if not page.items and params.cursor is None:
         raise HTTPException(status_code=404, detail="No users found")
     
-    return [schemas.UserResponse.model_validate(user) for user in users]
+    return page
 
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)) -> schemas.UserResponse:
     if not validation.check_email_is_valid(user.email):
@@ -48,9 +77,8 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)) -> sche
     db_user = models.User(email=user.email, password=hashed_password, username=user.username, phone_number=user.phone_number, role=user.role, wallet_balance=user.wallet_balance, created_at=user.created_at)
     db.add(db_user)
     db.commit()
-    db.refresh(db_user)
     
-    return schemas.UserResponse.model_validate(db_user)
+    return schemas.UserResponse.model_validate(_users(db).filter(models.User.id == db_user.id).one())
 
 def login_for_access_token(user: schemas.UserLogin, db: Session = Depends(get_db)):
     if not validation.check_email_is_valid(user.email):
@@ -59,12 +87,17 @@ def login_for_access_token(user: schemas.UserLogin, db: Session = Depends(get_db
     if db_user is None:
         raise HTTPException(status_code=404, detail="Email not exists")
     
-    if not validation.verify_password(user.password, db_user.password):
+    verified, upgraded_hash = validation.verify_and_update_password(user.password, db_user.password)
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect password")
+    if upgraded_hash:
+        # stored with an outdated cost factor; re-hashed while we have the password
+        db_user.password = upgraded_hash
+        db.commit()
     
     access_token_expires = timedelta(minutes=validation.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = validation.create_access_token(
-        data={"sub": user.email, "role": db_user.role}, expires_delta=access_token_expires
+        data={"sub": user.email, "role": db_user.role, "uid": db_user.id}, expires_delta=access_token_expires
     )
     return {
         "access_token": access_token,
@@ -94,29 +127,40 @@ def change_password(user: schemas.UserChangePassword, db: Session = Depends(get_
     }
 
 def get_user_by_email(email: str, db: Session = Depends(get_db)) -> schemas.UserResponse:
-    db_user = db.query(models.User).filter(models.User.email == email).first()
+    db_user = _users(db).filter(models.User.email == email).first()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     
     return schemas.UserResponse.model_validate(db_user)
 
 def get_user_by_id(user_id: int, db: Session = Depends(get_db)) -> schemas.UserResponse:
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    db_user = _users(db).filter(models.User.id == user_id).first()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     return schemas.UserResponse.model_validate(db_user)
 
+def _can_manage(token: dict, user_id: int, db_user=None) -> bool:
+    # The principal's id settles it without a query; tokens issued before the
+    # uid claim existed are matched on the loaded user's email instead.
+    if token['role'] == "admin":
+        return True
+    if token.get('id') is not None:
+        return token['id'] == user_id
+    return db_user is None or token['email'] == db_user.email
+
 def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db), token: dict = None) -> schemas.UserResponse:  
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if not _can_manage(token, user_id):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if token['role'] != "admin" and token.get('id') is None:
+        db_user = db.query(models.User).filter(models.User.id == user_id).first()
+        if not db_user:
+            raise HTTPException(status_code=404, detail="User not found")
+        if not _can_manage(token, user_id, db_user):
+            raise HTTPException(status_code=401, detail="Unauthorized")
     
     update_data = user.model_dump(exclude_unset=True)
     
-    if token['email'] != db_user.email and token['role'] != "admin":
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
     if "password" in update_data:
         if not validation.check_password_is_valid(update_data['password']):
             raise HTTPException(status_code=400, detail="Invalid password")
@@ -130,51 +174,103 @@ def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(ge
         if not validation.check_phone_number_is_valid(update_data['phone_number']):
             raise HTTPException(status_code=400, detail="Invalid phone number")
     
-    db.query(models.User).filter(models.User.id == user_id).update(update_data)
+    updated = repository.update_by_id(db, models.User, schemas.UserResponse, user_id, update_data, detail="User not found", options=user_summary())
     db.commit()
-    db.refresh(db_user)
-    
-    return schemas.UserResponse.model_validate(db_user)
+    return updated
 
 def delete_user(user_id: int, db: Session = Depends(get_db), token: str = Depends(get_current_user)):
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if token['email'] != db_user.email and token['role'] != "admin":
+    if not _can_manage(token, user_id):
         raise HTTPException(status_code=401, detail="Unauthorized")
-    db.delete(db_user)
+    if token['role'] != "admin" and token.get('id') is None:
+        db_user = db.query(models.User).filter(models.User.id == user_id).first()
+        if not db_user:
+            raise HTTPException(status_code=404, detail="User not found")
+        if not _can_manage(token, user_id, db_user):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+    # orders, their lines and transactions go with it through ON DELETE CASCADE
+    repository.delete_by_id(db, models.User, user_id, detail="User not found")
     db.commit()
     return {"message": "User deleted successfully"}
 
 
 # transaction controller 
-def create_transaction(transaction: schemas.TransactionCreate, db: Session = Depends(get_db)) -> schemas.TransactionResponse:
-    db_user = db.query(models.User).filter(models.User.id == transaction.user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+def apply_wallet_change(user_id: int, transaction_type: schemas.TransactionType, amount, db: Session = Depends(get_db)):
+    # One UPDATE ... RETURNING applies the change and row-locks the user until
+    # the caller commits, so concurrent transactions cannot lose updates.
+    if amount is None or amount <= 0:
+        raise HTTPException(status_code=400, detail="Invalid amount")
+    delta = amount if transaction_type == schemas.TransactionType.DEPOSIT else -amount
+    statement = (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(wallet_balance=models.User.wallet_balance + delta)
+        .returning(models.User.wallet_balance)
+        .execution_options(synchronize_session=False)
+    )
+    if transaction_type == schemas.TransactionType.WITHDRAW:
+        statement = statement.where(models.User.wallet_balance >= amount)
+    total_amount = db.execute(statement).scalar_one_or_none()
+    if total_amount is None:
+        if not validation.check_user_id_valid(user_id, db):
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=400, detail="Insufficient balance")
+    return total_amount - delta, total_amount
 
-    if transaction.transaction_type == "DEPOSIT":
-        db_user.wallet_balance += transaction.new_amount
-    elif transaction.transaction_type == "WITHDRAW":
-        if db_user.wallet_balance < transaction.new_amount:
-            raise HTTPException(status_code=400, detail="Insufficient balance")
-        db_user.wallet_balance -= transaction.new_amount 
+def _get_transaction_by_key(user_id: int, idempotency_key: str, db: Session):
+    return db.query(models.Transaction).filter(models.Transaction.user_id == user_id, models.Transaction.idempotency_key == idempotency_key).first()
 
-    db_transaction = models.Transaction(**transaction.model_dump())
+def _replay(db_transaction: models.Transaction, transaction: schemas.TransactionCreate) -> schemas.TransactionResponse:
+    # a retry gets the original result; a different request reusing the key is rejected
+    if db_transaction.new_amount != transaction.new_amount or db_transaction.transaction_type != transaction.transaction_type.value:
+        raise HTTPException(status_code=409, detail="Idempotency key was already used for a different request")
+    return schemas.TransactionResponse.model_validate(db_transaction)
+
+def create_transaction(transaction: schemas.TransactionCreate, db: Session = Depends(get_db), idempotency_key: str = None) -> schemas.TransactionResponse:
+    if idempotency_key:
+        db_transaction = _get_transaction_by_key(transaction.user_id, idempotency_key, db)
+        if db_transaction:
+            return _replay(db_transaction, transaction)
+
+    old_amount, total_amount = apply_wallet_change(transaction.user_id, transaction.transaction_type, transaction.new_amount, db)
+
+    db_transaction = models.Transaction(
+        user_id=transaction.user_id,
+        old_amount=old_amount,
+        new_amount=transaction.new_amount,
+        total_amount=total_amount,
+        transaction_type=transaction.transaction_type.value,
+        idempotency_key=idempotency_key,
+        created_at=transaction.created_at,
+    )
     db.add(db_transaction)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # a concurrent retry with the same key won; rolling back also undoes our balance change
+        db.rollback()
+        db_transaction = _get_transaction_by_key(transaction.user_id, idempotency_key, db) if idempotency_key else None
+        if db_transaction is None:
+            raise
+        return _replay(db_transaction, transaction)
     db.refresh(db_transaction)
-    db.refresh(db_user)
 
     return schemas.TransactionResponse.model_validate(db_transaction)
 
-def get_transactions(db: Session = Depends(get_db)) -> List[schemas.TransactionResponse]:
-    transactions = db.query(models.Transaction).all()
+def get_transactions(params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.TransactionResponse]:
+    page = pagination.paginate(db.query(models.Transaction), schemas.TransactionResponse, params)
     
-    if not transactions:
+    if not page.items and params.cursor is None:
         raise HTTPException(status_code=404, detail="No transactions found")
     
-    return [schemas.TransactionResponse.model_validate(transaction) for transaction in transactions]
+    return page
+
+TRANSACTION_EXPORT_COLUMNS = [models.Transaction.id, models.Transaction.user_id, models.Transaction.transaction_type, models.Transaction.old_amount, models.Transaction.new_amount, models.Transaction.total_amount, models.Transaction.idempotency_key, models.Transaction.created_at, models.Transaction.updated_at]
+
+def export_transactions(file_format: streaming.FileFormat, start: Optional[timerange.DateOrDatetime] = None, end: Optional[timerange.DateOrDatetime] = None, user_id: Optional[int] = None):
+    criteria = timerange.half_open(models.Transaction.created_at, start, end)
+    if user_id is not None:
+        criteria.append(models.Transaction.user_id == user_id)
+    return streaming.export_rows(select(*TRANSACTION_EXPORT_COLUMNS).where(*criteria).order_by(models.Transaction.id), file_format)
 
 def get_transaction(transaction_id: int, db: Session = Depends(get_db)) -> schemas.TransactionResponse:
     db_transaction = db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
@@ -192,54 +288,37 @@ def get_transaction_by_user_id(user_id: int, db: Session = Depends(get_db)) -> L
         raise HTTPException(status_code=404, detail="Transaction not found")
     return [schemas.TransactionResponse.model_validate(transaction) for transaction in db_transaction]
 
-def update_transaction(transaction_id: int, transaction: schemas.TransactionUpdateById, db: Session = Depends(get_db)) -> schemas.TransactionResponse:
-    db_user = db.query(models.User).filter(models.User.id == transaction.user_id).first()
-    if not db_user:
+def get_user_transactions(user_id: int, params: pagination.PageParams, db: Session = Depends(get_db)) -> pagination.Page[schemas.TransactionResponse]:
+    # newest first
+    query = db.query(models.Transaction).filter(models.Transaction.user_id == user_id)
+    page = pagination.paginate(query, schemas.TransactionResponse, params, descending=True)
+    if not page.items and params.cursor is None and not validation.check_user_id_valid(user_id, db):
         raise HTTPException(status_code=404, detail="User not found")
-    db_transaction = db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
-    if not db_transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    if transaction.transaction_type == "DEPOSIT":
-        db_user.wallet_balance = db_user.wallet_balance + transaction.new_amount
-    elif transaction.transaction_type == "WITHDRAW":
-        if db_user.wallet_balance < transaction.new_amount:
-            raise HTTPException(status_code=400, detail="Insufficient balance")
-        db_user.wallet_balance = db_user.wallet_balance - transaction.new_amount
-        
+    return page
+
+def update_transaction(transaction_id: int, transaction: schemas.TransactionUpdateById, db: Session = Depends(get_db)) -> schemas.TransactionResponse:
     update_data = transaction.model_dump(exclude_unset=True)
-    db.query(models.Transaction).filter(models.Transaction.id == transaction_id).update(update_data)
+    if transaction.transaction_type is not None:
+        update_data['old_amount'], update_data['total_amount'] = apply_wallet_change(transaction.user_id, transaction.transaction_type, transaction.new_amount, db)
+    elif not validation.check_user_id_valid(transaction.user_id, db):
+        raise HTTPException(status_code=404, detail="User not found")
     
+    # a missing transaction raises before the commit, so the wallet change is rolled back
+    updated = repository.update_by_id(db, models.Transaction, schemas.TransactionResponse, transaction_id, update_data, detail="Transaction not found")
     db.commit()
-    db.refresh(db_transaction)
-    db.refresh(db_user)
-    return schemas.TransactionResponse.model_validate(db_transaction)
+    return updated
 
 def update_transaction_by_user_id(user_id: int, transaction: schemas.TransactionUpdateByUserId, db: Session = Depends(get_db)) -> schemas.TransactionResponse:
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    db_transaction = db.query(models.Transaction).filter(models.Transaction.user_id == user_id).first()
-    if not db_transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    if transaction.transaction_type == "DEPOSIT":
-        db_user.wallet_balance = db_user.wallet_balance + transaction.new_amount
-    elif transaction.transaction_type == "WITHDRAW":
-        if db_user.wallet_balance < transaction.new_amount:
-            raise HTTPException(status_code=400, detail="Insufficient balance")
-        db_user.wallet_balance = db_user.wallet_balance - transaction.new_amount
+    update_data = transaction.model_dump(exclude_unset=True)
+    update_data['old_amount'], update_data['total_amount'] = apply_wallet_change(user_id, transaction.transaction_type, transaction.new_amount, db)
     
-    db_transaction = db.query(models.Transaction).filter(models.Transaction.user_id == user_id).update(transaction.model_dump(exclude_unset=True))
+    # only the user's latest transaction; earlier ledger rows keep their balances
+    latest = select(models.Transaction.id).where(models.Transaction.user_id == user_id).order_by(models.Transaction.created_at.desc(), models.Transaction.id.desc()).limit(1).scalar_subquery()
+    updated = repository.update_where(db, models.Transaction, schemas.TransactionResponse, update_data, models.Transaction.id == latest, detail="Transaction not found")
     db.commit()
-    db.refresh(db_transaction)
-    return schemas.TransactionResponse.model_validate(db_transaction)
+    return updated
 
 def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    db_transaction = db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
-    if not db_transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    db.delete(db_transaction)
+    repository.delete_by_id(db, models.Transaction, transaction_id, detail="Transaction not found")
     db.commit()
-    return {"message": "Transaction deleted successfully"}
\ No newline at end of file
+    return {"message": "Transaction deleted successfully"}
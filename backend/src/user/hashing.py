@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from os import environ
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy.util import await_only
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(environ.get('BCRYPT_ROUNDS', 12))
+# 0 hashes inline in the calling thread
+HASH_WORKERS = int(environ.get('HASH_WORKERS', 2))
+# jobs allowed to wait for a worker before new ones are refused with a 503
+HASH_QUEUE_DEPTH = int(environ.get('HASH_QUEUE_DEPTH', 32))
+HASH_RETRY_AFTER = int(environ.get('HASH_RETRY_AFTER', 1))
+
+# Hashes made with a different cost factor verify fine and are reported as
+# needing an update, which is how logins upgrade them.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+# These run in the worker processes
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_DEPTH)
+
+def _get_pool():
+    # created on first use so workers are forked from the serving process,
+    # not from whatever imported this module (multiprocessing is imported
+    # here too, off the startup path)
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        return _pool
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Server busy, try again later", headers={"Retry-After": str(HASH_RETRY_AFTER)})
+    try:
+        future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+def _call(fn, *args):
+    # Controllers are sync. In a threadpool worker the thread simply waits;
+    # inside AsyncSession.run_sync the caller is a greenlet on the event loop,
+    # so the wait is handed back to the loop instead of blocking it.
+    if HASH_WORKERS <= 0:
+        return fn(*args)
+    future = _submit(fn, *args)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return future.result()
+    return await_only(asyncio.wrap_future(future))
+
+def hash_password(password: str) -> str:
+    return _call(_hash, password)
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return _call(_verify, password, hashed_password)
+
+def verify_and_update(password: str, hashed_password: str) -> tuple:
+    # (matches, replacement hash or None when the stored one is current)
+    return _call(_verify_and_update, password, hashed_password)
@@ -1,36 +1,48 @@
-from sqlalchemy import Column, Integer, String, TIMESTAMP, text, DECIMAL, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, TIMESTAMP, text, DECIMAL, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import query_expression, relationship
 
 from database import Base
 
 class User(Base):
     __tablename__ = 'users'
     
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     username = Column(String, index=True, nullable=False)
     phone_number = Column(String, index=True, nullable=False)
-    role = Column(String, index=True, nullable=False)
+    role = Column(String, nullable=False)
     wallet_balance = Column(DECIMAL, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     
-    orders = relationship("Order", back_populates='user', cascade="all, delete")
-    transactions = relationship("Transaction", back_populates='user', cascade="all, delete")
+    # history aggregates, only set by queries using user.controllers.user_summary()
+    order_count = query_expression()
+    lifetime_spend = query_expression()
+    last_order_date = query_expression()
+    transaction_count = query_expression()
+    
+    # children are removed by ON DELETE CASCADE, never loaded just to be deleted
+    orders = relationship("Order", back_populates='user', cascade="all, delete", passive_deletes=True)
+    transactions = relationship("Transaction", back_populates='user', cascade="all, delete", passive_deletes=True)
     
 class Transaction(Base):
     __tablename__ = 'transactions'
     
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     old_amount = Column(DECIMAL, default=0, nullable=False)
     new_amount = Column(DECIMAL, default=0, nullable=False)
     total_amount = Column(DECIMAL, default=0, nullable=False)
     transaction_type = Column(String, nullable=False)
+    idempotency_key = Column(String, nullable=True)
     
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'))
     
     user = relationship("User", back_populates='transactions')
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'idempotency_key', name='uq_transactions_user_id_idempotency_key'),
+    )
     
\ No newline at end of file
@@ -1,17 +1,24 @@
 from user import controllers
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from order import controllers as order_controllers
+from order import schemas as order_schemas
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
 from user import schemas
 
-from database import get_db
+from database import AnySession, get_read_session, get_session, run
+from responses import ValidatedRoute
+import pagination
+import streaming
+import timerange
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from user import validation
 
 security = HTTPBearer()
 
-router = APIRouter(prefix="/user", tags=['User'])
-transaction_router = APIRouter(prefix="/transaction", tags=['Transaction'])
+router = APIRouter(prefix="/user", tags=['User'], route_class=ValidatedRoute)
+transaction_router = APIRouter(prefix="/transaction", tags=['Transaction'], route_class=ValidatedRoute)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
@@ -24,65 +31,78 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     return data_authorize
 
-@router.get('', response_model=list[schemas.UserResponse])
-def get_users(db: Session = Depends(get_db)):
-    return controllers.get_users(db)
+@router.get('', response_model=pagination.Page[schemas.UserResponse])
+async def get_users(params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_users, params, db=db)
 
 @router.get('/email/{email}', response_model=schemas.UserResponse)
-def get_user_by_email(email: str, db: Session = Depends(get_db)):
-    return controllers.get_user_by_email(email, db)
+async def get_user_by_email(email: str, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_user_by_email, email, db=db)
 
 @router.get('/user_id/{user_id}', response_model=schemas.UserResponse)
-def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
-    return controllers.get_user_by_id(user_id, db)
+async def get_user_by_id(user_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_user_by_id, user_id, db=db)
+
+@router.get('/user_id/{user_id}/orders', response_model=pagination.Page[order_schemas.OrderResponse])
+async def get_user_orders(user_id: int, params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(order_controllers.get_user_orders, user_id, params, db=db)
+
+@router.get('/user_id/{user_id}/transactions', response_model=pagination.Page[schemas.TransactionResponse])
+async def get_user_transactions(user_id: int, params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_user_transactions, user_id, params, db=db)
   
 @router.post('', status_code=201, response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return controllers.create_user(user, db)
+async def create_user(user: schemas.UserCreate, db: AnySession = Depends(get_session)):
+    return await run(controllers.create_user, user, db=db)
 
 @router.post('/login')
-def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    return controllers.login_for_access_token(user, db)
+async def login_user(user: schemas.UserLogin, db: AnySession = Depends(get_session)):
+    return await run(controllers.login_for_access_token, user, db=db)
 
 @router.put('/{user_id}')
-def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
-    return controllers.update_user(user_id, user, db, token)
+async def update_user(user_id: int, user: schemas.UserUpdate, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
+    return await run(controllers.update_user, user_id, user, db=db, token=token)
 
 @router.post('/change_password')
-def change_password(user: schemas.UserChangePassword, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
+async def change_password(user: schemas.UserChangePassword, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
     if token['email'] != user.email and token['role'] != 'admin':
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return controllers.change_password(user, db)
+    return await run(controllers.change_password, user, db=db)
 
 @router.delete('/{user_id}')
-def delete_user(user_id: int, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
-    return controllers.delete_user(user_id, db, token)
+async def delete_user(user_id: int, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
+    return await run(controllers.delete_user, user_id, db=db, token=token)
 
 # transaction 
-@transaction_router.get('', response_model=list[schemas.TransactionResponse])
-def get_transactions(db: Session = Depends(get_db)):
-    return controllers.get_transactions(db)
+@transaction_router.get('', response_model=pagination.Page[schemas.TransactionResponse])
+async def get_transactions(params: pagination.PageParams = Depends(pagination.page_params), db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_transactions, params, db=db)
+
+@transaction_router.get('/export')
+async def export_transactions(format: streaming.FileFormat = streaming.FileFormat.CSV, start_date: Optional[timerange.DateOrDatetime] = None, end_date: Optional[timerange.DateOrDatetime] = None, user_id: Optional[int] = None, token: dict = Depends(get_current_user)):
+    rows = controllers.export_transactions(format, start_date, end_date, user_id)
+    return StreamingResponse(rows, media_type=streaming.MEDIA_TYPES[format])
 
 @transaction_router.get("/{transaction_id}" , response_model=schemas.TransactionResponse)
-def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    return controllers.get_transaction(transaction_id, db)
+async def get_transaction(transaction_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_transaction, transaction_id, db=db)
 
 @transaction_router.get('/user/{user_id}', response_model=list[schemas.TransactionResponse])
-def get_transactions(user_id: int, db: Session = Depends(get_db)):
-    return controllers.get_transaction_by_user_id(user_id, db)
+async def get_transactions(user_id: int, db: AnySession = Depends(get_read_session)):
+    return await run(controllers.get_transaction_by_user_id, user_id, db=db)
 
 @transaction_router.post('', status_code=201, response_model=schemas.TransactionResponse)
-def create_transaction(transaction: schemas.TransactionCreate, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
-    return controllers.create_transaction(transaction, db)
+async def create_transaction(transaction: schemas.TransactionCreate, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user), idempotency_key: Optional[str] = Header(None)):
+    return await run(controllers.create_transaction, transaction, db=db, idempotency_key=idempotency_key)
 
 @transaction_router.put('/{transaction_id}')
-def update_transaction(transaction_id: int, transaction: schemas.TransactionUpdateById, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
-    return controllers.update_transaction(transaction_id, transaction, db)
+async def update_transaction(transaction_id: int, transaction: schemas.TransactionUpdateById, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
+    return await run(controllers.update_transaction, transaction_id, transaction, db=db)
 
 @transaction_router.put('/user/{user_id}')
-def update_transaction_by_user_id(user_id: int, transaction: schemas.TransactionUpdateByUserId, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
-    return controllers.update_transaction_by_user_id(user_id, transaction, db)
+async def update_transaction_by_user_id(user_id: int, transaction: schemas.TransactionUpdateByUserId, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
+    return await run(controllers.update_transaction_by_user_id, user_id, transaction, db=db)
 
 @transaction_router.delete('/{transaction_id}')
-def delete_transaction(transaction_id: int, db: Session = Depends(get_db), token: dict = Depends(get_current_user)):
-    return controllers.delete_transaction(transaction_id, db)
+async def delete_transaction(transaction_id: int, db: AnySession = Depends(get_session), token: dict = Depends(get_current_user)):
+    return await run(controllers.delete_transaction, transaction_id, db=db)
@@ -3,7 +3,6 @@ from typing import Optional
 from enum import Enum
 from datetime import datetime
 from decimal import Decimal
-from order import schemas
 
 class UserRole(str, Enum):
     ADMIN = "ADMIN"
@@ -53,6 +52,8 @@ class TransactionBase(BaseModel):
     transaction_type: TransactionType
         
 class TransactionCreate(TransactionBase):
+    # balances are read from the locked user row, not trusted from the client
+    old_amount: Optional[Decimal] = None
     user_id: int
     created_at: datetime
         
@@ -73,6 +74,7 @@ class TransactionResponse(BaseModel):
     new_amount: Decimal
     total_amount: Optional[Decimal]
     transaction_type: TransactionType
+    idempotency_key: Optional[str] = None
     
     created_at: datetime
     updated_at: datetime
@@ -88,8 +90,11 @@ class UserResponse(BaseModel):
     phone_number: str
     role: UserRole = UserRole.CUSTOMER
     wallet_balance: Decimal = 0.0
-    transactions: list[TransactionResponse]
-    orders: list[schemas.OrderResponse]
+    # summary of the history, which is paged through /user/user_id/{id}/orders and /transactions
+    order_count: int
+    lifetime_spend: Decimal
+    last_order_date: Optional[datetime] = None
+    transaction_count: int
     created_at: datetime
     updated_at: datetime
     
@@ -34,12 +34,15 @@ def check_user_id_valid(user_id: int, db):
     return False
     
 # authentication
-from passlib.context import CryptContext
+from user import hashing
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 
 from dotenv import load_dotenv
 from os import environ
+import hashlib
+import time
+
+from cache import TTLCache
 
 from pydantic import BaseModel
 
@@ -48,6 +51,14 @@ load_dotenv()
 SECRET_KEY = environ.get('SECRET_KEY')
 ALGORITHM = environ.get('ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = int(environ.get('TOKEN_CACHE_SIZE', 10000))
+# A cached principal is re-verified after this many seconds, so revoking
+# tokens (rotating SECRET_KEY) takes effect within it rather than at each exp
+TOKEN_CACHE_TTL = float(environ.get('TOKEN_CACHE_TTL', 60))
+
+# Verified principals keyed by token digest; each entry expires with its
+# token, or after TOKEN_CACHE_TTL if that comes first
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
 
 class Token(BaseModel):
     access_token: str
@@ -57,15 +68,17 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Union[str, None] = None
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt runs in the hashing process pool, see user/hashing.py
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    return hashing.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
     
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None):
     to_encode = data.copy()
@@ -74,10 +87,17 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    # python-jose pulls in its crypto backends; imported on first use to keep worker startup short
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 async def validate_token(token: str = Depends(oauth2_scheme)):
+    key = hashlib.sha256(token.encode()).digest()
+    principal = token_cache.get(key)
+    if principal is not None:
+        return dict(principal)
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -86,7 +106,13 @@ async def validate_token(token: str = Depends(oauth2_scheme)):
             raise HTTPException(status_code=400, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=400, detail="Invalid token")
-    return {
+    principal = {
+        "id": payload.get("uid"),
         "email": email,
         "role": role
-    }
\ No newline at end of file
+    }
+    # only tokens carrying exp are cached, and never past it
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(key, principal, ttl=min(expires_in, TOKEN_CACHE_TTL))
+    return dict(principal)